@@ -4,6 +4,7 @@ setup(
     name='pxxd',
     version='1.1.1',
     packages=['xxd', 'tests'],
+    extras_require={'numpy': ['numpy']},
     url='https://github.com/philhanna/xxd',
     license='MIT License',
     author='saspeh',
@@ -4,6 +4,7 @@ import subprocess
 import sys
 import tempfile
 from contextlib import contextmanager
+from io import BytesIO
 
 from tests.savedir import SaveDirectory
 
@@ -45,6 +46,17 @@ def stdin_redirected(new_stdin):
         sys.stdin = save_stdin
 
 
+def run_dumper(cls, args: dict, stdin=b"") -> bytes:
+    """Runs a dumper with the given bytes, or binary stream, as standard
+    input, and returns what it writes to standard output"""
+    with (BytesIO(stdin) if isinstance(stdin, bytes) else stdin as fpin,
+          stdin_redirected(fpin),
+          BytesIO() as fpout,
+          stdout_redirected(fpout)):
+        cls(args).run()
+        return fpout.getvalue()
+
+
 def runxxd(parms) -> subprocess.CompletedProcess:
     cp = subprocess.run(parms,
                         cwd=project_root_dir,
@@ -62,5 +74,6 @@ __all__ = [
     'stdout_redirected',
     'stderr_redirected',
     'stdin_redirected',
+    'run_dumper',
     'runxxd',
 ]
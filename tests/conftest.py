@@ -5,6 +5,21 @@ import pytest
 from tests import tmp
 
 
+@pytest.fixture
+def infile_data():
+    """The contents of infile, which a test module can override"""
+    return bytes(range(256)) * 20
+
+
+@pytest.fixture
+def infile(infile_data):
+    infile = Path(tmp).joinpath("infile")
+    with open(infile, "wb") as fp:
+        fp.write(infile_data)
+    yield str(infile)
+    infile.unlink()
+
+
 @pytest.fixture
 def file1():
     return Path(tmp).joinpath("file1")
@@ -0,0 +1,79 @@
+import mmap
+from array import array
+
+import pytest
+
+from tests import run_dumper
+from xxd import HexDumper, PostscriptDumper, CDumper, dump, iter_dump, undump
+
+DATA = bytes(range(256)) * 5 + bytes(1000) + b"the end"
+
+
+@pytest.mark.parametrize("cls,args", [
+    (HexDumper, {}),
+    (HexDumper, {"autoskip": True, "cols": 8, "block_size": 64}),
+    (HexDumper, {"seek": "-100", "little_endian": True}),
+    (HexDumper, {"binary": True, "len": 50, "uppercase": True}),
+    (PostscriptDumper, {"postscript": True, "seek": 7}),
+    (CDumper, {"include": True, "name": "x", "len": 777}),
+    (CDumper, {"include": True, "name": "x", "include_style": "string"}),
+])
+def test_dump_same_as_run(cls, args):
+    expected = run_dumper(cls, args, DATA)
+    assert dump(DATA, **args) == expected.decode("latin-1")
+
+
+@pytest.mark.parametrize("data", [
+    bytearray(DATA),
+    memoryview(DATA),
+    array("H", DATA[:1000]),
+])
+def test_dump_buffers(data):
+    assert dump(data) == dump(bytes(data))
+
+
+def test_dump_mmap():
+    with mmap.mmap(-1, len(DATA)) as mapping:
+        mapping[:] = DATA
+        assert dump(mapping, autoskip=True) == dump(DATA, autoskip=True)
+
+
+def test_iter_dump_is_lazy():
+    chunks = iter_dump(DATA, block_size=256)
+    assert next(chunks) == dump(DATA[:256])
+    assert "".join(chunks) == dump(DATA)[len(dump(DATA[:256])):]
+
+
+def test_include_default_name():
+    assert dump(b"A", include=True).startswith("unsigned char data[] = {\n")
+
+
+@pytest.mark.parametrize("args", [
+    {},
+    {"autoskip": True},
+    {"cols": 7, "octets_per_group": 3},
+    {"little_endian": True, "octets_per_group": 8},
+    {"binary": True},
+    {"postscript": True},
+    {"include": True},
+])
+def test_undump_round_trip(args):
+    assert undump(dump(DATA, **args), **args) == DATA
+
+
+def test_undump_into_bytearray():
+    out = bytearray(b"old contents that are much longer than the new")
+    text = dump(b"new").encode("ascii")
+    assert undump(memoryview(text), out) is out
+    assert out == b"new"
+
+
+def test_undump_seek():
+    assert undump(dump(b"abc"), seek=2) == b"\0\0abc"
+
+
+def test_files_are_not_allowed():
+    with pytest.raises(ValueError):
+        dump(DATA, infile="data.bin")
+    with pytest.raises(ValueError):
+        undump("", outfile="data.bin")
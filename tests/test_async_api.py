@@ -0,0 +1,148 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from xxd import dump
+from xxd.async_api import async_dump, async_undump
+
+DATA = bytes(range(256)) * 50 + bytes(5000) + b"the end"
+
+
+class Writer:
+    """Collects what is written, like a StreamWriter that drains slowly"""
+
+    def __init__(self, fail_after: int = None):
+        self.chunks = []
+        self.fail_after = fail_after
+
+    def write(self, data: bytes):
+        self.chunks.append(data)
+
+    async def drain(self):
+        if self.fail_after is not None and len(self.chunks) > self.fail_after:
+            raise ConnectionResetError("reset by peer")
+        await asyncio.sleep(0)
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.chunks)
+
+
+def stream_reader(data: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+async def chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        await asyncio.sleep(0)
+        yield data[i:i + size]
+
+
+@pytest.mark.parametrize("args", [
+    {},
+    {"autoskip": True, "block_size": 256},
+    {"len": 100, "block_size": 16},
+    {"seek": "+1000", "cols": 8},
+    {"postscript": True},
+    {"include": True, "block_size": 1000},
+])
+def test_dump(args):
+    async def main():
+        writer = Writer()
+        await async_dump(stream_reader(DATA), writer, **args)
+        return writer.getvalue()
+    assert asyncio.run(main()) == dump(DATA, **args).encode("latin-1")
+
+
+@pytest.mark.parametrize("args", [
+    {},
+    {"autoskip": True},
+    {"binary": True},
+    {"postscript": True},
+    {"include": True},
+])
+def test_undump(args):
+    async def main():
+        writer = Writer()
+        text = dump(DATA, **args).encode("latin-1")
+        await async_undump(chunks(text, 1000), writer, **args)
+        return writer.getvalue()
+    assert asyncio.run(main()) == DATA
+
+
+def test_many_dumps_share_the_loop():
+    async def one(k: int):
+        writer = Writer()
+        await async_dump(chunks(DATA[k:], 777), writer, executor=executor, block_size=4096)
+        return writer.getvalue()
+
+    async def main():
+        return await asyncio.gather(*[one(k) for k in range(20)])
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = asyncio.run(main())
+    assert results == [dump(DATA[k:]).encode("latin-1") for k in range(20)]
+
+
+def test_writer_error():
+    async def main():
+        await async_dump(stream_reader(DATA), Writer(fail_after=2), block_size=256)
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(main())
+
+
+def test_reader_error():
+    async def broken():
+        yield DATA[:100]
+        raise ConnectionAbortedError("upload failed")
+
+    async def main():
+        await async_dump(broken(), Writer())
+    with pytest.raises(ConnectionAbortedError):
+        asyncio.run(main())
+
+
+def test_dumper_error():
+    async def main():
+        text = b"00000010: 6162  ab\n00000000: 6364  cd\n"
+        await async_undump(stream_reader(text), Writer())
+    with pytest.raises(RuntimeError, match="cannot seek backwards"):
+        asyncio.run(main())
+
+
+def test_bad_option():
+    async def main():
+        await async_dump(stream_reader(b""), Writer(), cols=-1)
+    with pytest.raises(ValueError):
+        asyncio.run(main())
+
+
+def test_slow_writers_leave_default_executor_free():
+    """Dumps waiting on slow writers do not use up the threads of the
+    event loop's default executor"""
+
+    class StuckWriter(Writer):
+        def __init__(self, release: asyncio.Event):
+            super().__init__()
+            self.release = release
+
+        async def drain(self):
+            await self.release.wait()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=2))
+        release = asyncio.Event()
+        writers = [StuckWriter(release) for _ in range(10)]
+        dumps = [asyncio.create_task(async_dump(chunks(DATA, 1000), writer, block_size=256))
+                 for writer in writers]
+        await asyncio.sleep(0.1)
+        assert await asyncio.wait_for(asyncio.to_thread(lambda: "free"), timeout=5) == "free"
+        release.set()
+        await asyncio.gather(*dumps)
+        return [writer.getvalue() for writer in writers]
+
+    assert asyncio.run(main()) == [dump(DATA).encode("latin-1")] * 10
@@ -0,0 +1,113 @@
+import subprocess
+from io import BytesIO, StringIO
+from pathlib import Path
+
+import pytest
+
+from tests import project_root_dir, runxxd, tmp
+from xxd import dump
+from xxd.batch import batch_header, output_name, read_names, run_batch, split_names
+
+PPGM = "./pxxd"
+
+
+@pytest.fixture
+def files():
+    directory = Path(tmp).joinpath("batch")
+    directory.mkdir(exist_ok=True)
+    paths = []
+    for k in range(5):
+        path = directory.joinpath(f"file{k}.bin")
+        path.write_bytes(bytes(range(k * 40, k * 40 + 50)) + bytes(100 * k))
+        paths.append(str(path))
+    yield paths
+    for path in directory.iterdir():
+        path.unlink()
+    directory.rmdir()
+
+
+def expected_batch(paths: list[str], **options) -> bytes:
+    parts = []
+    for k, path in enumerate(paths):
+        parts.append(batch_header(options, path, k == 0))
+        parts.append(dump(Path(path).read_bytes(), **options).encode("latin-1"))
+    return b"".join(parts)
+
+
+def test_split_names():
+    assert split_names(b"a\0b c\0\0") == ["a", "b c"]
+    assert split_names(b"a\nb c\r\n\n") == ["a", "b c"]
+    assert split_names(b"") == []
+
+
+def test_read_names(files):
+    listfile = Path(tmp).joinpath("batch", "list")
+    listfile.write_text("\n".join(files[1:3]) + "\n")
+    assert read_names([files[0], f"@{listfile}"], BytesIO()) == files[:3]
+    assert read_names([], BytesIO(b"\0".join(f.encode() for f in files))) == files
+
+
+def test_output_name():
+    assert output_name("{dir}/{stem}.hex", "data/a.bin", 0) == "data/a.hex"
+    assert output_name("{stem}.hex", "a.bin", 0) == "a.hex"
+    assert output_name("out/{index:03d}-{name}", "x/a.bin", 7) == "out/007-a.bin"
+    assert output_name("{path}.hex", "x/a.bin", 0) == "x/a.bin.hex"
+    with pytest.raises(ValueError):
+        output_name("{nope}.hex", "a.bin", 0)
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+@pytest.mark.parametrize("options", [{}, {"autoskip": True, "cols": 8}, {"postscript": True}])
+def test_concatenated(files, jobs, options):
+    fpout = BytesIO()
+    assert run_batch(options, files, None, fpout, StringIO(), jobs) == 0
+    assert fpout.getvalue() == expected_batch(files, **options)
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_template(files, jobs):
+    template = "{dir}/{stem}.hex"
+    assert run_batch({}, files, template, BytesIO(), StringIO(), jobs) == 0
+    for path in files:
+        data = Path(path).read_bytes()
+        assert Path(path).with_suffix(".hex").read_text() == dump(data)
+
+    template = "{dir}/{stem}.out"
+    hexes = [str(Path(path).with_suffix(".hex")) for path in files]
+    assert run_batch({"reverse": True}, hexes, template, BytesIO(), StringIO(), jobs) == 0
+    for path in files:
+        assert Path(path).with_suffix(".out").read_bytes() == Path(path).read_bytes()
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_missing_file(files, jobs):
+    fpout = BytesIO()
+    fperr = StringIO()
+    names = [files[0], files[0] + ".missing", files[1]]
+    assert run_batch({}, names, None, fpout, fperr, jobs) == 1
+    assert fpout.getvalue() == expected_batch([files[0], files[1]])
+    assert "No such file or directory" in fperr.getvalue()
+
+
+def test_bad_options(files):
+    fperr = StringIO()
+    with pytest.raises(ValueError):
+        run_batch({"cols": "-1"}, files, None, BytesIO(), fperr)
+    assert fperr.getvalue() == ""
+    with pytest.raises(ValueError):
+        run_batch({"reverse": True}, files, None, BytesIO(), fperr)
+
+
+def test_pxxd_batch(files):
+    cp = subprocess.run([PPGM, "--batch", "-i", "-n", "blob", "-j", "2"], cwd=project_root_dir,
+                        input="\0".join(files).encode(), capture_output=True, check=True)
+    assert cp.stdout == expected_batch(files, include=True, name="blob")
+
+
+def test_pxxd_arguments(files):
+    cp = runxxd([PPGM, "--batch", *files])
+    assert cp.stdout.encode("latin-1") == expected_batch(files)
+    cp = runxxd([PPGM, *files])
+    assert cp.stdout == "Only one input file and one output file can be given without --batch.\n"
+    cp = runxxd([PPGM, "--output-template", "{stem}.hex", files[0]])
+    assert cp.stdout == "--output-template only works with --batch.\n"
@@ -0,0 +1,31 @@
+import sys
+from io import BytesIO, StringIO
+
+from xxd.binary_io import binary_input, binary_output
+
+
+def test_binary_streams_are_unchanged():
+    with BytesIO() as fp:
+        assert binary_input(fp) is fp
+        assert binary_output(fp) is fp
+
+
+def test_stdio_uses_buffer():
+    assert binary_input(sys.__stdin__) is sys.__stdin__.buffer
+    assert binary_output(sys.__stdout__) is sys.__stdout__.buffer
+
+
+def test_text_only_input():
+    with StringIO("4b52\n414d") as fp:
+        stream = binary_input(fp)
+        assert stream.readline() == b"4b52\n"
+        buffer = bytearray(10)
+        assert stream.readinto(buffer) == 4
+        assert buffer[:4] == b"414d"
+
+
+def test_text_only_output():
+    with StringIO() as fp:
+        stream = binary_output(fp)
+        stream.write(b"KRAMER\xff")
+        assert fp.getvalue() == "KRAMER\xff"
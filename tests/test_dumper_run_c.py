@@ -1,8 +1,11 @@
 import filecmp
+import os
 from io import StringIO
 from pathlib import Path
 
-from tests import tmp, runxxd, stdout_redirected
+import pytest
+
+from tests import tmp, runxxd, stdout_redirected, testdata
 from xxd import CDumper
 
 CPGM = "xxd"
@@ -86,3 +89,121 @@ unsigned int XXDFILE_LEN = 11;
 """
     assert actual == expected
     file1.unlink()
+
+
+@pytest.mark.parametrize("options", [
+    [], ["-c", "5"], ["-c", "1"], ["-c", "0"],
+    ["-l", "24"], ["-l", "25"], ["-l", "0"], ["-s", "7", "-l", "100"],
+])
+@pytest.mark.parametrize("block_size", ["7", "1024"])
+def test_include_edges(options, block_size, file1, file2):
+    """Rows end and the last row has no comma exactly as in xxd, however
+    the input is read"""
+    infile = Path(tmp).joinpath("infile")
+    with open(infile, "wb") as fp:
+        fp.write(bytes(range(256)) * 4)
+
+    runxxd([CPGM, "-i", *options, infile, file1])
+    runxxd([PPGM, "-i", "--block-size", block_size, *options, infile, file2])
+
+    assert filecmp.cmp(file1, file2)
+    infile.unlink()
+    file1.unlink()
+    file2.unlink()
+
+
+def run_include_style(args: dict) -> str:
+    with StringIO() as out, stdout_redirected(out):
+        CDumper(dict(args, include=True)).run()
+        return out.getvalue()
+
+
+def test_string_style():
+    file1 = Path(tmp).joinpath("XXDFile")
+    with open(file1, "wb") as fp:
+        fp.write(b"TESTabcd09\n\0\"")
+
+    actual = run_include_style({"include_style": "string", "infile": str(file1), "name": "XXDFile", "cols": 8})
+    expected = """\
+unsigned char XXDFile[] =
+  "\\x54\\x45\\x53\\x54\\x61\\x62\\x63\\x64"
+  "\\x30\\x39\\x0a\\x00\\x22"
+  ;
+unsigned int XXDFile_len = 13;
+"""
+    assert actual == expected
+    file1.unlink()
+
+
+def test_embed_style():
+    infile = os.path.join(testdata, "short")
+    actual = run_include_style({"include_style": "embed", "infile": infile, "len": 10, "name": "short", "capitalize": True})
+    expected = f"""\
+unsigned char SHORT[] = {{
+#embed "{os.path.abspath(infile)}" limit(10)
+}};
+unsigned int SHORT_LEN = sizeof(SHORT);
+"""
+    assert actual == expected
+
+
+def test_embed_relative_to_outfile(tmp_path):
+    infile = tmp_path.joinpath("assets", "a.bin")
+    outfile = tmp_path.joinpath("build", "a.h")
+    infile.parent.mkdir()
+    outfile.parent.mkdir()
+    infile.write_bytes(b"abc")
+    CDumper({"include": True, "include_style": "embed", "infile": str(infile), "outfile": str(outfile)}).run()
+    assert '#embed "../assets/a.bin"' in outfile.read_text()
+
+
+def test_incbin_style():
+    infile = os.path.join(testdata, "short")
+    actual = run_include_style({"include_style": "incbin", "infile": infile, "seek": "-8", "name": "blob"})
+    expected = f"""\
+\t.section .rodata
+\t.global blob
+\t.global blob_end
+\t.global blob_len
+blob:
+\t.incbin "{os.path.abspath(infile)}", 60
+blob_end:
+\t.balign 4
+blob_len:
+\t.int blob_end - blob
+\t.section .note.GNU-stack,"",@progbits
+"""
+    assert actual == expected
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_chunks(jobs):
+    infile = Path(tmp).joinpath("infile")
+    indata = bytes(range(256)) * 10
+    with open(infile, "wb") as fp:
+        fp.write(indata)
+    index = Path(tmp).joinpath("chunks.h")
+    args = {"include": True, "chunk_size": 1000, "seek": 100, "name": "data", "jobs": jobs}
+    CDumper(dict(args, infile=str(infile), outfile=str(index))).run()
+
+    with open(index) as fp:
+        text = fp.read()
+    assert "data_0,\n  data_1,\n  data_2\n" in text
+    assert "1000,\n  1000,\n  460\n" in text
+    assert "data_chunk_count = 3;" in text
+    assert "data_len = 2460;" in text
+
+    # Each chunk is an include file of its part of the input
+    for k, start in enumerate(range(100, len(indata), 1000)):
+        chunk = Path(tmp).joinpath(f"chunks_{k}.c")
+        with open(chunk) as fp:
+            assert fp.readline() == f"unsigned char data_{k}[] = {{\n"
+        part = Path(tmp).joinpath("part")
+        CDumper({"include": True, "reverse": True, "infile": str(chunk), "outfile": str(part)}).run()
+        with open(part, "rb") as fp:
+            assert fp.read() == indata[start:start + 1000]
+        chunk.unlink()
+        part.unlink()
+
+    index.unlink()
+    infile.unlink()
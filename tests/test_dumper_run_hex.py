@@ -4,7 +4,7 @@ from pathlib import Path
 
 import pytest
 
-from tests import project_root_dir, runxxd
+from tests import project_root_dir, runxxd, tmp
 from xxd import HexDumper
 
 CPGM = "xxd"
@@ -194,3 +194,74 @@ def test_dont_show_traceback():
     cp = runxxd(parms)
     errmsg = cp.stdout
     assert "No such file or directory" in errmsg
+
+
+def test_binary_stdin():
+    """Bytes from stdin are dumped as they are, not decoded as text"""
+    indata = bytes(range(256))
+    expected = subprocess.run([CPGM], cwd=project_root_dir, check=True,
+                              input=indata, capture_output=True).stdout
+    actual = subprocess.run([PPGM], cwd=project_root_dir, check=True,
+                            input=indata, capture_output=True).stdout
+    assert actual == expected
+
+
+@pytest.mark.parametrize("pattern", [
+    "z", "zz", "zzz", "zzzz", "zzzn", "nznzn", "nzznzzzn", "nzzz", "nzzzzzp",
+])
+def test_autoskip_runs(pattern, file1, file2):
+    """Runs of zero lines, where z is a line of zeros, n is a line that is
+    not, and p is a partial line of zeros"""
+    lines = {"z": bytes(16), "n": b"A" * 16, "p": bytes(5)}
+    infile = Path(tmp).joinpath("infile")
+    with open(infile, "wb") as fp:
+        fp.write(b"".join(lines[c] for c in pattern))
+
+    runxxd([CPGM, "-a", infile, file1])
+    runxxd([PPGM, "-a", infile, file2])
+
+    assert filecmp.cmp(file1, file2)
+    infile.unlink()
+    file1.unlink()
+    file2.unlink()
+
+
+def test_autoskip_sparse_file(file1, file2):
+    """Holes in a sparse file are skipped like any other zeros"""
+    infile = Path(tmp).joinpath("infile")
+    with open(infile, "wb") as fp:
+        fp.write(b"start")
+        fp.seek(0x300001)
+        fp.write(b"middle")
+        fp.truncate(0x600000)
+
+    runxxd([CPGM, "-a", infile, file1])
+    runxxd([PPGM, "-a", infile, file2])
+
+    assert filecmp.cmp(file1, file2)
+    infile.unlink()
+    file1.unlink()
+    file2.unlink()
+
+
+@pytest.mark.parametrize("options", [
+    ["-e"], ["-e", "-g", "8"], ["-e", "-g", "2"], ["-e", "-u"], ["-e", "-c", "8"],
+    ["-g", "1"], ["-g", "4"], ["-g", "8"], ["-c", "7", "-g", "3"], ["-b", "-g", "2"],
+])
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_group_layouts(options, engine, file1, file2):
+    """Groups other than the default, and -e groups with their bytes
+    reversed, are laid out as xxd lays them out"""
+    if engine == "numpy":
+        pytest.importorskip("numpy")
+    infile = Path(tmp).joinpath("infile")
+    with open(infile, "wb") as fp:
+        fp.write(bytes(range(256)) * 20 + b"end")
+
+    runxxd([CPGM, *options, infile, file1])
+    runxxd([PPGM, "--engine", engine, *options, infile, file2])
+
+    assert filecmp.cmp(file1, file2)
+    infile.unlink()
+    file1.unlink()
+    file2.unlink()
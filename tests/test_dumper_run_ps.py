@@ -3,6 +3,8 @@ from io import StringIO
 from os import chdir
 from pathlib import Path
 
+import pytest
+
 from tests import project_root_dir, stdout_redirected, stdin_redirected, SaveDirectory, runxxd, testdata
 from xxd import PostscriptDumper
 
@@ -86,3 +88,21 @@ def test_ps_reverse_stdout():
         app.run()
         actual = fpout.getvalue()
     assert actual == expected
+
+
+@pytest.mark.parametrize("options", [
+    ["-c", "0"], ["-c", "1"], ["-c", "7"], ["-c", "300"], ["-c", "65536"],
+    ["-u"], ["-s", "5", "-l", "100"], ["-c", "0", "-l", "0"],
+])
+@pytest.mark.parametrize("block_size", ["7", "1024"])
+def test_postscript_lines(options, block_size, file1, file2):
+    """Lines of any width, or no line breaks with -c 0, as in xxd"""
+    parms = [CPGM, "-ps", *options, "testdata/xxd.1", file1]
+    runxxd(parms)
+
+    parms = [PPGM, "-ps", "--block-size", block_size, *options, "testdata/xxd.1", file2]
+    runxxd(parms)
+
+    assert filecmp.cmp(file1, file2)
+    file1.unlink()
+    file2.unlink()
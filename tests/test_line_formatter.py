@@ -0,0 +1,32 @@
+import pytest
+
+from xxd import HexDumper
+from xxd.line_formatter import LineFormatter
+
+
+@pytest.mark.parametrize("args,expected", [
+    ({}, b"00000000: 4e6f 7720 6973 0a                        Now is.\n"),
+    ({"uppercase": True, "offset": 0x10}, b"00000010: 4E6F 7720 6973 0A                        Now is.\n"),
+    ({"decimal": True, "octets_per_group": 4}, b"00000000: 4e6f7720 69730a                      Now is.\n"),
+    ({"EBCDIC": True, "cols": 8}, b"00000000: 4e6f 7720 6973 0a    +?.....\n"),
+    ({"little_endian": True}, b"00000000: 20776f4e   0a7369                    Now is.\n"),
+    ({"binary": True}, b"00000000: 01001110 01101111 01110111 00100000 01101001 01110011  Now is\n"),
+])
+def test_format_line(args, expected):
+    formatter = LineFormatter(HexDumper(args))
+    data = b"Now is\n"[:formatter.cols]
+    assert formatter.format_line(0, data) == expected
+
+
+@pytest.mark.parametrize("args", [
+    {},
+    {"cols": 7},
+    {"binary": True, "octets_per_group": 2},
+    {"uppercase": True, "decimal": True, "offset": 99},
+])
+def test_format_lines_matches_format_line(args):
+    formatter = LineFormatter(HexDumper(args))
+    data = bytes(range(256)) * 2
+    cols = formatter.cols
+    expected = b"".join(formatter.format_line(i, data[i:i + cols]) for i in range(0, len(data), cols))
+    assert formatter.format_lines(0, memoryview(data)) == expected
@@ -0,0 +1,32 @@
+import pytest
+
+from tests import run_dumper
+from xxd import HexDumper, PostscriptDumper, CDumper
+
+
+@pytest.mark.parametrize("cls,args", [
+    (HexDumper, {}),
+    (HexDumper, {"seek": 1000, "len": 2000, "block_size": 100}),
+    (HexDumper, {"seek": 99999}),
+    (PostscriptDumper, {"postscript": True, "seek": 7, "len": 3000}),
+    (CDumper, {"include": True, "name": "x", "seek": 5, "len": 777}),
+])
+def test_mapped_same_as_streamed(infile, cls, args):
+    with open(infile, "rb") as fp:
+        data = fp.read()
+    expected = run_dumper(cls, args, stdin=data)
+    actual = run_dumper(cls, dict(args, infile=infile))
+    assert actual == expected
+
+
+def test_regular_file_is_mapped(infile):
+    dumper = HexDumper({"infile": infile, "seek": 16})
+    dumper.open_input()
+    try:
+        dumper.seek_input()
+        assert dumper.source is not None
+        assert dumper.position == 16
+        assert dumper.fpin.tell() == 0
+    finally:
+        dumper.close_input()
+    assert dumper.source is None
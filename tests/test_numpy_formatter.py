@@ -0,0 +1,45 @@
+import subprocess
+import sys
+
+import pytest
+
+from tests import project_root_dir
+from xxd import HexDumper
+from xxd.line_formatter import LineFormatter
+
+pytest.importorskip("numpy")
+
+from xxd.numpy_formatter import NumpyLineFormatter, MIN_LINES
+
+
+@pytest.mark.parametrize("args", [
+    {},
+    {"uppercase": True},
+    {"decimal": True, "offset": 12345},
+    {"EBCDIC": True, "octets_per_group": 4},
+    {"cols": 7, "octets_per_group": 3},
+    {"binary": True},
+    {"binary": True, "octets_per_group": 2, "cols": 9},
+    {"offset": 0xffffff00},
+    {"decimal": True, "offset": 99999000},
+])
+def test_same_as_line_formatter(args):
+    dumper = HexDumper(args)
+    data = bytes(range(256)) * (MIN_LINES // 4) + b"tail"
+    expected = LineFormatter(dumper).format_lines(0, data)
+    actual = NumpyLineFormatter(dumper).format_lines(0, memoryview(data))
+    assert actual == expected
+
+
+def test_engine_option():
+    assert HexDumper({"engine": "numpy"}).engine == "numpy"
+
+
+def test_numpy_imported_only_when_used():
+    """NumPy is not imported for a dump too small to need it"""
+    code = ("import sys; from xxd import dump; dump(b'hi', engine='numpy');"
+            "print('numpy' in sys.modules); dump(bytes(4096), engine='numpy');"
+            "print('numpy' in sys.modules)")
+    cp = subprocess.run([sys.executable, "-c", code], cwd=project_root_dir,
+                        check=True, capture_output=True, text=True)
+    assert cp.stdout == "False\nTrue\n"
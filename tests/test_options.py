@@ -0,0 +1,104 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from xxd import CDumper, HexDumper, Options, PostscriptDumper, dump, make_options, undump
+from xxd.options import OPTION_NAMES
+
+DATA = bytes(range(256)) * 40
+
+
+@pytest.mark.parametrize("args,cls", [
+    ({}, HexDumper),
+    ({"binary": True, "cols": 4}, HexDumper),
+    ({"little_endian": True}, HexDumper),
+    ({"postscript": True}, PostscriptDumper),
+    ({"include": True, "name": "x"}, CDumper),
+])
+def test_same_as_arguments(args, cls):
+    options = Options(args)
+    assert options.dumper_class is cls
+    expected = cls(args)
+    actual = options.dumper()
+    for name in OPTION_NAMES:
+        assert getattr(actual, name) == getattr(expected, name), name
+    assert actual.args == args
+
+
+def test_defaults_per_output_type():
+    assert Options({}).cols == 16
+    assert Options({"binary": True}).cols == 6
+    assert Options({"little_endian": True}).octets_per_group == 4
+    assert Options({"postscript": True}).cols == 30
+    assert Options({"include": True, "name": "x"}).cols == 12
+
+
+def test_frozen():
+    options = Options({"cols": 8})
+    with pytest.raises(AttributeError):
+        options.cols = 4
+    with pytest.raises(AttributeError):
+        del options.cols
+    with pytest.raises(AttributeError):
+        options.color = True
+    with pytest.raises(TypeError):
+        options.args["cols"] = 4
+    assert not hasattr(options, "__dict__")
+
+
+def test_checked_once():
+    with pytest.raises(ValueError):
+        Options({"cols": -1})
+    with pytest.raises(ValueError):
+        Options({"binary": True, "postscript": True})
+
+
+def test_formatter_is_shared():
+    options = Options({"cols": 8})
+    assert options.formatter is not None
+    assert options.dumper().get_formatter() is options.formatter
+    assert Options({"postscript": True}).formatter is None
+    assert Options({"cols": 0}).formatter is None
+
+
+def test_dumpers_are_separate():
+    options = Options({})
+    first, second = options.dumper(), options.dumper()
+    first.args["cols"] = 4
+    assert second.args == {}
+    assert dict(options.args) == {}
+
+
+def test_pickle():
+    options = Options({"cols": 8, "autoskip": True}, HexDumper)
+    copy = pickle.loads(pickle.dumps(options))
+    assert copy.dumper_class is HexDumper
+    assert dict(copy.args) == dict(options.args)
+    assert copy.cols == 8
+
+
+def test_threads_share_options():
+    options = make_options(cols=8, autoskip=True)
+    blobs = [DATA[k:] for k in range(50)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda blob: dump(blob, options), blobs))
+    assert results == [dump(blob, cols=8, autoskip=True) for blob in blobs]
+
+
+def test_api_options():
+    options = make_options(include=True)
+    assert dump(b"A", options).startswith("unsigned char data[] = {\n")
+    reverse = make_options(reverse=True, include=True)
+    assert undump(dump(DATA, options), options=reverse) == DATA
+
+
+def test_api_option_errors():
+    with pytest.raises(ValueError):
+        dump(DATA, make_options(), cols=8)
+    with pytest.raises(ValueError):
+        undump("", options=make_options())
+    with pytest.raises(ValueError):
+        dump(DATA, make_options(reverse=True))
+    with pytest.raises(ValueError):
+        dump(DATA, Options({"outfile": "x.txt"}))
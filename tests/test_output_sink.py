@@ -0,0 +1,63 @@
+from io import BytesIO, StringIO
+
+import pytest
+
+from tests import stdin_redirected, stdout_redirected
+from xxd import HexDumper
+from xxd.binary_io import binary_output
+from xxd.output_sink import OutputSink
+
+
+class CountingBytesIO(BytesIO):
+    """Records how many times it was written to and flushed"""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+        self.flushes = 0
+
+    def write(self, b):
+        self.writes += 1
+        return super().write(b)
+
+    def flush(self):
+        self.flushes += 1
+
+
+@pytest.mark.parametrize("flush_policy,writes,flushes", [
+    ("line", 10, 11),
+    ("block", 4, 2),
+    ("end", 3, 1),
+])
+def test_flush_policy(flush_policy, writes, flushes):
+    fpout = CountingBytesIO()
+    sink = OutputSink(fpout, flush_policy, buffer_size=40)
+    for i in range(10):
+        sink.write(b"0123456789")
+        if i == 4:
+            sink.end_block()
+    sink.close()
+    assert fpout.getvalue() == b"0123456789" * 10
+    assert (fpout.writes, fpout.flushes) == (writes, flushes)
+
+
+def test_text_output():
+    with StringIO() as fpout:
+        sink = OutputSink(binary_output(fpout))
+        sink.write(b"abc\n")
+        sink.close()
+        assert fpout.getvalue() == "abc\n"
+
+
+@pytest.mark.parametrize("flush_policy", ["line", "block", "end"])
+def test_dump_output_does_not_depend_on_policy(flush_policy):
+    data = bytes(range(256)) * 10
+    outputs = []
+    for args in [{}, {"flush": flush_policy, "block_size": 64}]:
+        with (BytesIO(data) as infile,
+              stdin_redirected(infile),
+              BytesIO() as outfile,
+              stdout_redirected(outfile)):
+            HexDumper(args).run()
+            outputs.append(outfile.getvalue())
+    assert outputs[0] == outputs[1]
@@ -0,0 +1,132 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from tests import project_root_dir, run_dumper, tmp
+from xxd import HexDumper, PostscriptDumper, CDumper
+from xxd.parallel import split_input, split_text
+
+
+@pytest.fixture
+def infile_data():
+    """Runs of zeros long enough to cross range boundaries"""
+    data = bytearray(b"The quick brown fox jumps over the lazy dog. " * 100)
+    data[1000:3000] = bytes(2000)
+    return bytes(data) + bytes(700) + b"end"
+
+
+@pytest.mark.parametrize("cls,args", [
+    (HexDumper, {}),
+    (HexDumper, {"autoskip": True}),
+    (HexDumper, {"autoskip": True, "cols": 7, "seek": 100, "len": 4000}),
+    (HexDumper, {"seek": 33, "len": 3000, "offset": 0x100}),
+    (PostscriptDumper, {"postscript": True}),
+    (PostscriptDumper, {"postscript": True, "cols": 7, "seek": 5, "len": 999}),
+    (CDumper, {"include": True}),
+    (CDumper, {"include": True, "cols": 5, "len": 1001}),
+    (CDumper, {"include": True, "include_style": "string", "seek": 7}),
+])
+def test_same_as_serial(infile, cls, args):
+    args = dict(args, infile=infile)
+    expected = run_dumper(cls, args)
+    actual = run_dumper(cls, dict(args, jobs=3))
+    assert actual == expected
+
+
+def test_split_input(infile):
+    dumper = HexDumper({"infile": infile, "seek": 10, "len": 1000, "jobs": 3})
+    dumper.open_input()
+    try:
+        assert split_input(dumper) == [(10, 346), (346, 682), (682, 1010)]
+    finally:
+        dumper.close_input()
+
+
+@pytest.mark.skipif(not Path("/proc/version").exists(), reason="needs /proc")
+@pytest.mark.parametrize("cls,args", [
+    (HexDumper, {}),
+    (PostscriptDumper, {"postscript": True}),
+    (CDumper, {"include": True}),
+])
+def test_proc_file_is_not_split(cls, args):
+    # Files in /proc claim to be empty, but have contents when read
+    args = dict(args, infile="/proc/version")
+    expected = run_dumper(cls, args)
+    digits = expected.replace(b"0x", b"").replace(b",", b"").replace(b" ", b"")
+    assert Path("/proc/version").read_bytes()[:4].hex().encode() in digits
+    assert run_dumper(cls, dict(args, jobs=2)) == expected
+
+
+def test_stdin_is_not_split():
+    assert split_input(HexDumper({"jobs": 3})) is None
+
+
+@pytest.fixture
+def dumpfile(infile):
+    """A hex dump of the input file"""
+    dumpfile = Path(tmp).joinpath("dumpfile")
+    HexDumper({"infile": infile, "outfile": str(dumpfile)}).run()
+    yield str(dumpfile)
+    dumpfile.unlink()
+
+
+def test_split_text(dumpfile):
+    ranges = split_text(HexDumper({"reverse": True, "infile": dumpfile, "jobs": 4}))
+    assert len(ranges) == 4
+    with open(dumpfile, "rb") as fp:
+        text = fp.read()
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(text)
+    for (start, stop), (next_start, _) in zip(ranges, ranges[1:]):
+        assert stop == next_start
+        assert text[stop - 1:stop] == b"\n"
+
+
+@pytest.mark.parametrize("cls,args", [
+    (HexDumper, {}),
+    (HexDumper, {"autoskip": True}),
+    (HexDumper, {"little_endian": True}),
+    (PostscriptDumper, {"postscript": True}),
+    (PostscriptDumper, {"postscript": True, "cols": 7}),
+])
+@pytest.mark.parametrize("seek", [None, 16])
+def test_reverse_same_as_serial(infile, cls, args, seek):
+    dumpfile = Path(tmp).joinpath("dumpfile")
+    outfile = Path(tmp).joinpath("outfile")
+    cls(dict(args, infile=infile, outfile=str(dumpfile))).run()
+
+    args = dict(args, reverse=True, seek=seek, infile=str(dumpfile), outfile=str(outfile))
+    cls(args).run()
+    with open(outfile, "rb") as fp:
+        expected = fp.read()
+    cls(dict(args, jobs=3)).run()
+    with open(outfile, "rb") as fp:
+        assert fp.read() == expected
+
+    dumpfile.unlink()
+    outfile.unlink()
+
+
+def test_reverse_odd_digits(infile):
+    """A postscript range that starts with the second digit of a pair"""
+    dumpfile = Path(tmp).joinpath("dumpfile")
+    outfile = Path(tmp).joinpath("outfile")
+    with open(dumpfile, "wb") as fp:
+        fp.write(b"4" + b"1" * 1001)
+
+    args = {"reverse": True, "postscript": True, "infile": str(dumpfile), "outfile": str(outfile)}
+    PostscriptDumper(dict(args, jobs=4)).run()
+    with open(outfile, "rb") as fp:
+        assert fp.read() == b"\x41" + b"\x11" * 500
+
+    dumpfile.unlink()
+    outfile.unlink()
+
+
+def test_pool_imported_only_with_jobs():
+    """Starting a process pool is only paid for when --jobs asks for one"""
+    code = "import sys, xxd; xxd.dump(b'hi'); print('concurrent.futures' in sys.modules)"
+    cp = subprocess.run([sys.executable, "-c", code], cwd=project_root_dir,
+                        check=True, capture_output=True, text=True)
+    assert cp.stdout == "False\n"
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+
+from tests import tmp
+from xxd import HexDumper, PostscriptDumper
+
+
+def get_test_data():
+    return bytes(range(256)) * 64
+
+
+@pytest.fixture
+def target():
+    target = Path(tmp).joinpath("target")
+    with open(target, "wb") as fp:
+        fp.write(get_test_data())
+    yield str(target)
+    target.unlink()
+
+
+@pytest.fixture
+def patchfile():
+    patchfile = Path(tmp).joinpath("patchfile")
+    yield patchfile
+    patchfile.unlink()
+
+
+def read(filename) -> bytes:
+    with open(filename, "rb") as fp:
+        return fp.read()
+
+
+def test_patch_lines(target, patchfile):
+    with open(patchfile, "wb") as fp:
+        fp.write(b"00000010: 4142 4344  ABCD\n")
+        fp.write(b"00002000: 45  E\n")
+    HexDumper({"reverse": True, "patch": True, "infile": str(patchfile), "outfile": target}).run()
+
+    expected = bytearray(get_test_data())
+    expected[0x10:0x14] = b"ABCD"
+    expected[0x2000:0x2001] = b"E"
+    assert read(target) == expected
+
+
+def test_patch_past_end(target, patchfile):
+    with open(patchfile, "wb") as fp:
+        fp.write(b"00004010: 4142  AB\n")
+    HexDumper({"reverse": True, "patch": True, "infile": str(patchfile), "outfile": target}).run()
+    assert read(target) == get_test_data() + bytes(0x10) + b"AB"
+
+
+def test_patch_with_seek(target, patchfile):
+    with open(patchfile, "wb") as fp:
+        fp.write(b"00000000: 4142  AB\n")
+    HexDumper({"reverse": True, "patch": True, "seek": 0x100, "infile": str(patchfile), "outfile": target}).run()
+
+    expected = bytearray(get_test_data())
+    expected[0x100:0x102] = b"AB"
+    assert read(target) == expected
+
+
+def test_patch_ps(target, patchfile):
+    with open(patchfile, "wb") as fp:
+        fp.write(b"414243\n")
+    args = {"reverse": True, "postscript": True, "patch": True, "seek": 8, "infile": str(patchfile), "outfile": target}
+    PostscriptDumper(args).run()
+
+    expected = bytearray(get_test_data())
+    expected[8:11] = b"ABC"
+    assert read(target) == expected
+
+
+def test_patch_missing_target(patchfile):
+    patchfile.touch()
+    target = Path(tmp).joinpath("no-such-target")
+    with pytest.raises(RuntimeError) as err:
+        HexDumper({"reverse": True, "patch": True, "infile": str(patchfile), "outfile": str(target)})
+    assert "No such file" in str(err.value)
@@ -0,0 +1,89 @@
+import selectors
+import subprocess
+import sys
+from io import BytesIO
+
+import pytest
+
+from tests import project_root_dir, run_dumper
+from xxd import HexDumper
+
+
+def get_test_data():
+    """Returns 1000 bytes with runs of zeros in among the text"""
+    data = bytearray(b"The quick brown fox jumps over the lazy dog. " * 10)
+    data[100:200] = bytes(100)
+    return bytes(data) + bytes(500) + b"end"
+
+
+@pytest.mark.parametrize("args", [
+    {},
+    {"cols": 7},
+    {"seek": 5},
+    {"len": 333},
+    {"seek": 17, "len": 100, "offset": 0x1000},
+    {"autoskip": True},
+    {"autoskip": True, "seek": 3, "cols": 9},
+])
+@pytest.mark.parametrize("block_size", [1, 16, 50, 4096])
+def test_block_size_does_not_change_output(args, block_size):
+    data = get_test_data()
+    expected = run_dumper(HexDumper, args, data)
+    actual = run_dumper(HexDumper, dict(args, block_size=block_size), data)
+    assert actual == expected
+
+
+def test_lines_span_reads():
+    """Lines are still whole when the input arrives in odd-sized pieces"""
+
+    class Trickle(BytesIO):
+        def readinto(self, b):
+            return super().readinto(b[:5])
+
+        def readinto1(self, b):
+            return super().readinto1(b[:5])
+
+    data = get_test_data()
+    actual = run_dumper(HexDumper, {}, Trickle(data))
+    assert actual == run_dumper(HexDumper, {}, data)
+
+
+def test_lines_shown_as_they_arrive():
+    """Whole lines from a pipe are shown without waiting for a full block
+    or the end of the input"""
+    pxxd = subprocess.Popen([sys.executable, "pxxd", "--flush", "line"], cwd=project_root_dir,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        pxxd.stdin.write(b"0123456789abcdefXYZ")
+        pxxd.stdin.flush()
+        with selectors.DefaultSelector() as selector:
+            selector.register(pxxd.stdout, selectors.EVENT_READ)
+            assert selector.select(timeout=10), "no output before the end of the input"
+        line = pxxd.stdout.readline()
+        assert line == b"00000000: 3031 3233 3435 3637 3839 6162 6364 6566  0123456789abcdef\n"
+        pxxd.stdin.write(b"world")
+        pxxd.stdin.close()
+        assert pxxd.stdout.read() == b"00000010: 5859 5a77 6f72 6c64                      XYZworld\n"
+    finally:
+        pxxd.kill()
+        pxxd.wait()
+        pxxd.stdout.close()
+
+
+def test_holes_are_not_read(file1):
+    with open(file1, "wb") as fp:
+        fp.write(b"data")
+        fp.truncate(0x400000)
+    dumper = HexDumper({"infile": str(file1), "block_size": 4096})
+    dumper.open_input()
+    try:
+        dumper.seek_input()
+        if dumper.hole_length(0x100000, 0x400000, 16) == 0:
+            pytest.skip("file system does not report holes")
+        blocks = [block if type(block) == int else bytes(block)
+                  for block in dumper.read_blocks(16, skip_holes=True)]
+    finally:
+        dumper.close_input()
+    assert blocks[0] == b"data" + bytes(4092)
+    assert blocks[1] == 0x400000 - 4096
+    file1.unlink()
@@ -0,0 +1,83 @@
+import subprocess
+
+import pytest
+
+from tests import project_root_dir
+from xxd import CDumper
+
+
+def get_test_data():
+    return bytes(range(256)) * 4 + b"end"
+
+
+@pytest.fixture
+def infile_data():
+    return get_test_data()
+
+
+def reverse(file1, file2, **kwargs) -> bytes:
+    args = dict(kwargs, reverse=True, include=True, infile=str(file1), outfile=str(file2))
+    CDumper(args).run()
+    with open(file2, "rb") as fp:
+        return fp.read()
+
+
+@pytest.mark.parametrize("options", [[], ["-u"], ["-C"], ["-c", "5"], ["-n", "data"]])
+@pytest.mark.parametrize("block_size", [7, 1024, 1 << 20])
+def test_reverse_c(infile, file1, file2, options, block_size):
+    subprocess.run(["xxd", "-i", *options, infile, file1], cwd=project_root_dir, check=True)
+    assert reverse(file1, file2, block_size=block_size) == get_test_data()
+    file1.unlink()
+    file2.unlink()
+
+
+def test_reverse_c_without_heading(file1, file2):
+    """xxd -i writes only the literals when it reads standard input"""
+    with open(file1, "wb") as fp:
+        subprocess.run(["xxd", "-i"], input=get_test_data(), stdout=fp, check=True)
+    assert reverse(file1, file2, block_size=10) == get_test_data()
+    file1.unlink()
+    file2.unlink()
+
+
+def test_reverse_c_with_seek(file1, file2):
+    with open(file1, "wb") as fp:
+        fp.write(b"unsigned char x[] = {\n  0x41, 0x42\n};\nunsigned int x_len = 2;\n")
+    assert reverse(file1, file2, seek=4) == b"\0\0\0\0AB"
+    file1.unlink()
+    file2.unlink()
+
+
+def test_reverse_c_bad_length(file1, file2):
+    with open(file1, "wb") as fp:
+        fp.write(b"unsigned char x[] = {\n  0x41, 0x42\n};\nunsigned int x_len = 3;\n")
+    with pytest.raises(RuntimeError) as err:
+        reverse(file1, file2)
+    assert "has 2 bytes but x_len is 3" in str(err.value)
+    file1.unlink()
+    file2.unlink()
+
+
+@pytest.mark.parametrize("block_size", [7, 1024])
+def test_reverse_c_bad_length_capitalized(infile, file1, file2, block_size):
+    """With -C, the length variable is upper case, and is still checked"""
+    cp = subprocess.run(["xxd", "-i", "-C", infile], cwd=project_root_dir, check=True, capture_output=True)
+    text = cp.stdout.replace(b"_LEN = 1027;", b"_LEN = 99;")
+    assert b"_LEN = 99;" in text
+    with open(file1, "wb") as fp:
+        fp.write(text)
+    with pytest.raises(RuntimeError) as err:
+        reverse(file1, file2, block_size=block_size)
+    assert "has 1027 bytes but" in str(err.value)
+    assert "_LEN is 99" in str(err.value)
+    file1.unlink()
+    file2.unlink()
+
+
+def test_reverse_c_length_of_another_array(file1, file2):
+    """Only the length variable of the array itself is checked"""
+    with open(file1, "wb") as fp:
+        fp.write(b"unsigned char x[] = {\n  0x41, 0x42\n};\nunsigned int xy_len = 3;\n")
+    assert reverse(file1, file2) == b"AB"
+    file1.unlink()
+    file2.unlink()
@@ -1,8 +1,12 @@
 import filecmp
+import os
+from io import BytesIO, UnsupportedOperation
 from os import chdir
 from pathlib import Path
 
-from tests import project_root_dir, SaveDirectory, tmp, runxxd
+import pytest
+
+from tests import project_root_dir, SaveDirectory, tmp, runxxd, stdin_redirected, stdout_redirected
 from xxd import HexDumper
 
 
@@ -72,3 +76,163 @@ def test_reverse_with_seek(file1, file2):
     infile.unlink()
     file1.unlink()
     file2.unlink()
+
+
+@pytest.mark.parametrize("line, expected", [
+    (b"00000000: 4e6f 7720 6973  Now is\n", (0, b"Now is")),
+    (b"00000000: 4E6F 7720 6973  Now is\n", (0, b"Now is")),
+    (b"00000000: 4e 6f 77 20 69  Now i\n", (0, b"Now i")),
+    (b"00000000: 4e6f 7  No\n", (0, b"No")),
+    (b"00000000: 4e6f7720  Now \n", (0, b"Now ")),
+    (b"0001fff0: 4e6f  No\n", (0x1fff0, b"No")),
+    (b"1fX: 4e6f  No\n", (0x1f, b"No")),
+    (b"this is not a hex dump\n", None),
+    (b"00000000: 4e6f\n", (0, b"No")),
+    (b"00000000: 4e6f", (0, b"No")),
+])
+def test_decode_line(line, expected):
+    assert HexDumper({}).decode_line(line) == expected
+
+
+def test_reverse_in_batches(file1, file2):
+    infile = Path(tmp).joinpath("infile")
+    indata = bytes(range(256)) * 100
+    with open(infile, "wb") as fp:
+        fp.write(indata)
+    HexDumper({"infile": str(infile), "outfile": str(file1)}).run()
+
+    # Use a batch size that is not a multiple of the line length
+    HexDumper({"reverse": True, "block_size": 1000, "infile": str(file1), "outfile": str(file2)}).run()
+    assert filecmp.cmp(infile, file2)
+
+    infile.unlink()
+    file1.unlink()
+    file2.unlink()
+
+
+@pytest.mark.parametrize("hexdump, seek", [
+    (b"00000010: 4142  AB\n00000000: 4344  CD\n", None),
+    (b"00000010: 4142  AB\n00000000: 4344  CD\n", 4),
+    (b"00000004: 4142  AB\n00000020: 4344  CD\n", -2),
+    (b"00000000: 4142  AB\n00000002: 4344  CD\n", None),
+    (b"00100000: 41\n", None),
+])
+def test_reverse_offsets_same_as_xxd(file1, file2, hexdump, seek):
+    with open(file1, "wb") as fp:
+        fp.write(hexdump)
+    parms = ["xxd", "-r", file1, file2]
+    if seek is not None:
+        parms[2:2] = ["-s", str(seek)]
+    runxxd(parms)
+    with open(file2, "rb") as fp:
+        expected = fp.read()
+    file2.unlink()
+
+    HexDumper({"reverse": True, "seek": seek, "infile": str(file1), "outfile": str(file2)}).run()
+    with open(file2, "rb") as fp:
+        assert fp.read() == expected
+
+    file1.unlink()
+    file2.unlink()
+
+
+class Pipe(BytesIO):
+    """An output stream that cannot seek, like a pipe"""
+
+    def seek(self, *args):
+        raise UnsupportedOperation("not seekable")
+
+
+def test_reverse_gap_to_pipe():
+    with (BytesIO(b"00000004: 4142  AB\n00000020: 4344  CD\n") as fpin,
+          stdin_redirected(fpin),
+          Pipe() as fpout,
+          stdout_redirected(fpout)):
+        HexDumper({"reverse": True, "block_size": 8}).run()
+        assert fpout.getvalue() == bytes(4) + b"AB" + bytes(26) + b"CD"
+
+
+def test_reverse_backwards_to_pipe():
+    with (BytesIO(b"00000010: 4142  AB\n00000000: 4344  CD\n") as fpin,
+          stdin_redirected(fpin),
+          Pipe() as fpout,
+          stdout_redirected(fpout)):
+        with pytest.raises(RuntimeError) as err:
+            HexDumper({"reverse": True}).run()
+        assert "cannot seek backwards" in str(err.value)
+
+
+@pytest.mark.parametrize("pattern", [
+    "z", "zz", "zzz", "zzzz", "zzzn", "nznzn", "nzznzzzn", "nzzz", "nzzzzzp",
+])
+def test_reverse_autoskip(pattern, file1, file2):
+    """A dump made with -a reverses to the original file.  Each z is a
+    line of zeros, each n a line of text, and p a partial line."""
+    infile = Path(tmp).joinpath("infile")
+    lines = {"z": bytes(16), "n": b"0123456789abcdef", "p": b"xyz"}
+    indata = b"".join(lines[c] for c in pattern)
+    with open(infile, "wb") as fp:
+        fp.write(indata)
+
+    HexDumper({"autoskip": True, "infile": str(infile), "outfile": str(file1)}).run()
+    HexDumper({"reverse": True, "infile": str(file1), "outfile": str(file2)}).run()
+    assert filecmp.cmp(infile, file2, shallow=False)
+
+    infile.unlink()
+    file1.unlink()
+    file2.unlink()
+
+
+def test_reverse_autoskip_sparse(file1, file2):
+    """Zeros left out by -a become a hole in the output file"""
+    infile = Path(tmp).joinpath("infile")
+    size = 1 << 30
+    with open(infile, "wb") as fp:
+        fp.write(b"start")
+        fp.seek(size - 3)
+        fp.write(b"end")
+
+    HexDumper({"autoskip": True, "infile": str(infile), "outfile": str(file1)}).run()
+    HexDumper({"reverse": True, "infile": str(file1), "outfile": str(file2)}).run()
+    assert os.path.getsize(file2) == size
+    assert os.stat(file2).st_blocks * 512 < size
+    with open(file2, "rb") as fp:
+        assert fp.read(5) == b"start"
+        fp.seek(size - 3)
+        assert fp.read() == b"end"
+
+    infile.unlink()
+    file1.unlink()
+    file2.unlink()
+
+
+@pytest.mark.parametrize("options", [
+    ["-b"], ["-b", "-g", "2"], ["-b", "-c", "5"],
+    ["-e"], ["-e", "-g", "8"], ["-e", "-g", "2"], ["-e", "-u"], ["-e", "-c", "8"],
+    ["-e", "-g", "0"], ["-e", "-g", "0", "-c", "8"],
+])
+@pytest.mark.parametrize("size", [1, 7, 5123])
+def test_reverse_layouts(options, size, file1, file2):
+    """Binary dumps and -e dumps made by xxd reverse to the original file"""
+    infile = Path(tmp).joinpath("infile")
+    indata = (bytes(range(256)) * 21)[:size]
+    with open(infile, "wb") as fp:
+        fp.write(indata)
+    runxxd(["xxd", *options, infile, file1])
+
+    args = {"reverse": True, "infile": str(file1), "outfile": str(file2)}
+    for option, value in zip(options, options[1:] + [None]):
+        if option == "-b":
+            args["binary"] = True
+        elif option == "-e":
+            args["little_endian"] = True
+        elif option == "-g":
+            args["octets_per_group"] = value
+        elif option == "-c":
+            args["cols"] = value
+    HexDumper(args).run()
+    assert filecmp.cmp(infile, file2, shallow=False)
+
+    infile.unlink()
+    file1.unlink()
+    file2.unlink()
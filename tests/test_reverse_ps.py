@@ -1,7 +1,10 @@
 import filecmp
+import subprocess
 from os import chdir
 from pathlib import Path
 
+import pytest
+
 from tests import project_root_dir, SaveDirectory, tmp, runxxd
 from xxd import PostscriptDumper
 
@@ -80,3 +83,32 @@ def test_reverse_ps_with_seek(file1, file2):
     infile.unlink()
     file1.unlink()
     file2.unlink()
+
+
+@pytest.mark.parametrize("hexdump", [
+    b"4e6f77",
+    b"4e6\nf7\n",
+    b"4e x6f 7 0",
+    b"4e6f7",
+    b"4E6F 77\r\n20 69\n",
+    b"",
+])
+@pytest.mark.parametrize("block_size", [1, 3, 1024])
+def test_reverse_ps_same_as_xxd(file1, file2, hexdump, block_size):
+    with open(file1, "wb") as fp:
+        fp.write(hexdump)
+    expected = subprocess.run(["xxd", "-r", "-p", file1], check=True, capture_output=True).stdout
+
+    args = {
+        "reverse": True,
+        "postscript": True,
+        "block_size": block_size,
+        "infile": str(file1),
+        "outfile": str(file2)
+    }
+    PostscriptDumper(args).run()
+    with open(file2, "rb") as fp:
+        assert fp.read() == expected
+
+    file1.unlink()
+    file2.unlink()
@@ -0,0 +1,71 @@
+from io import BytesIO, UnsupportedOperation
+
+import pytest
+
+from tests import run_dumper
+from xxd import HexDumper
+
+
+class Pipe(BytesIO):
+    """An input stream that cannot seek, like a pipe"""
+
+    def seek(self, *args):
+        raise UnsupportedOperation("not seekable")
+
+    def seekable(self):
+        return False
+
+
+def get_test_data():
+    return bytes(range(256)) * 40
+
+
+@pytest.fixture
+def infile_data():
+    return get_test_data()
+
+
+@pytest.mark.parametrize("seek", ["0x100", "+0x100", "-0x100", "-4096", "-1", "5000", "20000"])
+def test_pipe_same_as_file(infile, seek):
+    expected = run_dumper(HexDumper, {"seek": seek, "infile": infile})
+    actual = run_dumper(HexDumper, {"seek": seek, "block_size": 1000}, Pipe(get_test_data()))
+    assert actual == expected
+
+
+def test_from_end():
+    actual = run_dumper(HexDumper, {"seek": "-4"}, Pipe(b"0123456789"))
+    assert actual == b"00000006: 3637 3839                                6789\n"
+
+
+@pytest.mark.parametrize("seek", ["+-2", "-11"])
+def test_cannot_seek(seek):
+    with pytest.raises(RuntimeError) as err:
+        run_dumper(HexDumper, {"seek": seek}, Pipe(b"0123456789"))
+    assert "cannot seek" in str(err.value)
+
+
+@pytest.mark.parametrize("seek,max_reads", [("-16", 12), ("+5000", 7)])
+def test_pipe_read_in_blocks(seek, max_reads):
+    """A pipe is read a block at a time however close to the end the dump
+    starts, and a forward skip reads no further than it needs to"""
+
+    class CountingPipe(Pipe):
+        reads = 0
+
+        def readinto(self, b):
+            CountingPipe.reads += 1
+            return super().readinto(b)
+
+    pipe = CountingPipe(get_test_data())
+    actual = run_dumper(HexDumper, {"seek": seek, "block_size": 1000}, pipe)
+    assert actual == run_dumper(HexDumper, {"seek": seek}, Pipe(get_test_data()))
+    assert CountingPipe.reads <= max_reads
+
+
+@pytest.mark.parametrize("seek", ["-100000", "+-2"])
+def test_cannot_seek_redirected_file(infile, seek):
+    """Standard input redirected from a file can seek, but not back past
+    its start, which is reported as it is for a named file"""
+    with pytest.raises(RuntimeError) as err:
+        run_dumper(HexDumper, {"seek": seek}, open(infile, "rb"))
+    assert str(err.value) == "Sorry, cannot seek."
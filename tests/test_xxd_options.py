@@ -1,3 +1,5 @@
+import os
+
 import pytest
 
 from xxd import HexDumper, CDumper, PostscriptDumper
@@ -5,6 +7,7 @@ from xxd import HexDumper, CDumper, PostscriptDumper
 
 @pytest.mark.parametrize("attrname,expected", [
     ("autoskip", False),
+    ("block_size", 1 << 20),
     ("cols", 16),
     ("octets_per_group", 2),
     ("include", False),
@@ -25,14 +28,32 @@ def test_defaults(attrname, expected):
 @pytest.mark.parametrize("parms,substring", [
     ({"binary": True, "include": True}, "incompatible"),
     ({"binary": True, "postscript": True}, "incompatible"),
-    ({"binary": True, "reverse": True}, "incompatible"),
     ({"little_endian": True, "include": True}, "incompatible"),
     ({"little_endian": True, "postscript": True}, "incompatible"),
-    ({"little_endian": True, "reverse": True}, "incompatible"),
+    ({"little_endian": True, "binary": True}, "incompatible"),
+    ({"little_endian": True, "octets_per_group": 3}, "power of 2"),
+    ({"block_size": "bogus"}, "not numeric"),
+    ({"block_size": 0}, "positive"),
+    ({"engine": "bogus"}, "not one of"),
+    ({"flush": "never"}, "not one of"),
     ({"len": "bogus"}, "not numeric"),
     ({"len": "-1"}, "negative"),
     ({"offset": "bogus"}, "numeric"),
     ({"offset": "-86"}, "negative"),
+    ({"seek": "+bogus"}, "not numeric"),
+    ({"patch": True, "outfile": "target"}, "only works with -r"),
+    ({"include": True, "include_style": "bogus"}, "not one of"),
+    ({"include": True, "chunk_size": "0"}, "positive"),
+    ({"chunk_size": 100}, "only works with -i"),
+    ({"include": True, "chunk_size": 100, "include_style": "incbin", "infile": "testdata/short"}, "does not work"),
+    ({"include": True, "chunk_size": 100}, "needs an input file"),
+    ({"include": True, "chunk_size": 100, "infile": "testdata/short"}, "needs an output file"),
+    ({"include_style": "string"}, "only works with -i"),
+    ({"include": True, "include_style": "embed"}, "needs an input file"),
+    ({"include": True, "include_style": "embed", "infile": "-"}, "needs an input file"),
+    ({"include": True, "include_style": "embed", "infile": "testdata/short", "seek": 4}, "-s does not work"),
+    ({"include": True, "include_style": "string", "reverse": True}, "-r does not work"),
+    ({"patch": True, "reverse": True}, "needs an output file"),
 ])
 def test_substring_in_errmsg(parms, substring):
     """Tests for incompatible options"""
@@ -45,9 +66,13 @@ def test_substring_in_errmsg(parms, substring):
 @pytest.mark.parametrize("parms,attrname,expected", [
     ({"autoskip": True}, "autoskip", True),
     ({"binary": True}, "cols", 6),
+    ({"block_size": "0x1000"}, "block_size", 4096),
     ({"decimal": True}, "decimal", True),
+    ({"engine": "python"}, "engine", "python"),
     ({"binary": True}, "octets_per_group", 1),
     ({"little_endian": True}, "octets_per_group", 4),
+    ({"little_endian": True, "reverse": True}, "little_endian", True),
+    ({"binary": True, "reverse": True}, "binary", True),
     ({"postscript": True}, "octets_per_group", 2),
     ({"infile": "/usr/bin/cut"}, "infile", "/usr/bin/cut"),
     ({"infile": "-"}, "infile", "-"),
@@ -58,6 +83,11 @@ def test_substring_in_errmsg(parms, substring):
     ({"postscript": True}, "postscript", True),
     ({"reverse": True}, "reverse", True),
     ({"seek": 0x0100}, "seek", 256),
+    ({"seek": "+0x10"}, "seek", 16),
+    ({"seek": "+0x10"}, "seek_whence", os.SEEK_CUR),
+    ({"seek": "-0x10"}, "seek", -16),
+    ({"seek": "-0x10"}, "seek_whence", os.SEEK_END),
+    ({"seek": "0x10"}, "seek_whence", os.SEEK_SET),
     ({"uppercase": True}, "uppercase", True),
     ({"version": True}, "version", True),
 ])
@@ -72,3 +102,9 @@ def test_postscriptdumper():
 
 def test_cdumper():
     assert CDumper({"include": True}).cols == 12
+
+
+def test_postscript_wide_lines():
+    assert PostscriptDumper({"postscript": True, "cols": 65536}).cols == 65536
+    with pytest.raises(ValueError):
+        HexDumper({"cols": 65536})
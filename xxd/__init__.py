@@ -4,6 +4,7 @@ import sys
 version_string = "xxd 2022-09-16 by Juergen Weigert et al."
 os_version = " (win32)" if sys.platform[0:3] == "win" else ""
 COLS = 256
+BLOCK_SIZE = 1 << 20  # Default number of bytes read from the input at a time
 ebcdic_table = [
     0x00, 0x01, 0x02, 0x03, 0x80, 0x09, 0x81, 0x7F,
     0x82, 0x83, 0x84, 0x0B, 0x0C, 0x0D, 0x0E, 0x0F,
@@ -40,19 +41,27 @@ ebcdic_table = [
 ]
 
 from .hex_type import HexType
+from .options import Options
 from .dumper import Dumper
 from .hex_dumper import HexDumper
 from .c_dumper import CDumper
 from .ps_dumper import PostscriptDumper
+from .api import dump, iter_dump, make_options, undump
 
 __all__ = [
+    'BLOCK_SIZE',
     'CDumper',
     'COLS',
     'Dumper',
+    'dump',
     'ebcdic_table',
     'HexDumper',
     'HexType',
+    'iter_dump',
+    'make_options',
+    'Options',
     'os_version',
     'PostscriptDumper',
+    'undump',
     'version_string',
 ]
@@ -0,0 +1,83 @@
+"""Functions that dump buffers in memory and reverse dumps into them.
+
+The options are the keys of the argument dictionary of a Dumper, given
+as keyword arguments, for example cols=8, autoskip=True or include=True.
+Options from make_options() can be given instead, to save checking the
+same keyword options on every call.  Nothing is read from or written to a file or a standard stream."""
+import io
+
+from xxd.binary_io import BufferInput, BufferOutput
+from xxd.options import Options, choose_dumper_class
+from xxd.output_sink import OutputSink
+
+
+def buffer_args(args: dict, reverse: bool) -> dict:
+    """Returns the arguments of a dumper that works on buffers.  Buffers
+    have no file name, so C include output is named "data" unless a
+    name is given."""
+    for name in ["infile", "outfile"]:
+        if args.get(name, None) is not None:
+            raise ValueError(f"{name} cannot be used with a buffer.")
+    args = dict(args, reverse=reverse)
+    if args.get("include", False) and not args.get("name", None):
+        args["name"] = "data"
+    return args
+
+
+def make_options(reverse: bool = False, **options) -> Options:
+    """Returns Options for dumping buffers, or for reversing dumps into
+    them if reverse is set.  They are checked once, and can then be
+    passed to any number of calls, in any thread."""
+    return Options(buffer_args(options, reverse))
+
+
+def make_dumper(options: Options | None, kwargs: dict, reverse: bool):
+    """Returns a dumper with either the Options or the keyword options"""
+    if options is None:
+        args = buffer_args(kwargs, reverse)
+        return choose_dumper_class(args)(args)
+    if kwargs:
+        raise ValueError("Options cannot be given along with keyword options.")
+    if options.reverse != reverse:
+        raise ValueError(f"These options are for {'reversing' if options.reverse else 'making'} a dump.")
+    buffer_args(options.args, reverse)
+    return options.dumper()
+
+
+def iter_dump(data, options: Options = None, **kwargs):
+    """Generator that yields the dump of a buffer, such as bytes, a
+    bytearray, a memoryview or an mmap, in chunks of text as they are
+    formatted.  The buffer is formatted where it is, not copied."""
+    dumper = make_dumper(options, kwargs, reverse=False)
+    dumper.source = memoryview(data).cast("B")
+    try:
+        dumper.seek_input()
+        for output in dumper.iter_output():
+            yield output.decode("latin-1")
+    finally:
+        dumper.close_input()
+
+
+def dump(data, options: Options = None, **kwargs) -> str:
+    """Returns the dump of a buffer as a string"""
+    return "".join(iter_dump(data, options, **kwargs))
+
+
+def undump(text, out: bytearray = None, options: Options = None, **kwargs) -> bytearray:
+    """Reconstructs the bytes described by a dump, which is a string or
+    a buffer, and returns them.  They replace the contents of 'out' if
+    it is given, or go into a new bytearray otherwise."""
+    if out is None:
+        out = bytearray()
+    del out[:]
+    if isinstance(text, str):
+        text = text.encode("latin-1")
+    dumper = make_dumper(options, kwargs, reverse=True)
+    dumper.fpin = io.BufferedReader(BufferInput(text), dumper.block_size)
+    dumper.fpout = BufferOutput(out)
+    dumper.sink = OutputSink(dumper.fpout, "end", dumper.block_size)
+    try:
+        dumper.mainline_reverse()
+    finally:
+        dumper.sink.close()
+    return out
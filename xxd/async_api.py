@@ -0,0 +1,185 @@
+"""Coroutines that dump and reverse asynchronous streams.
+
+The dumper runs in a worker thread, where it formats the input a block
+at a time as usual, so the event loop is never blocked.  It is connected to the event loop by two small queues.  The input is
+read into one of them as the dumper needs it, and the output is taken
+from the other and written, waiting for the writer to drain.  When the
+writer is slow, the queues fill up and the input stops being read.
+
+Each dump in progress has a thread of its own, unless an executor is
+given, in which case it holds one of the executor's threads for as long
+as it lasts.  An executor for many concurrent dumps should therefore
+have a thread for each of them."""
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from xxd.api import make_dumper
+from xxd.options import Options
+from xxd.output_sink import OutputSink
+
+# Most chunks of input or output waiting in each queue
+QUEUE_SIZE = 4
+
+
+class StreamBridge:
+    """The queues that connect a dumper in a worker thread to the event
+    loop.  Their methods are coroutines that run on the event loop.
+    None in either queue marks the end of the input or output."""
+
+    def __init__(self):
+        self.inbox = asyncio.Queue(QUEUE_SIZE)
+        self.outbox = asyncio.Queue(QUEUE_SIZE)
+        self.stopped = False
+
+    async def get_input(self):
+        """Returns the next chunk of input, or None at the end of it"""
+        if self.stopped:
+            return None
+        return await self.inbox.get()
+
+    async def put_output(self, data):
+        """Queues a chunk of output, unless no one is taking it any more"""
+        if not self.stopped:
+            await self.outbox.put(data)
+
+    def stop(self):
+        """Ends the input and throws away the output, waking up the
+        worker thread if it is waiting for either of them"""
+        self.stopped = True
+        if self.inbox.empty():
+            self.inbox.put_nowait(None)
+        while not self.outbox.empty():
+            self.outbox.get_nowait()
+
+
+class StreamInput(io.RawIOBase):
+    """Reads, in a worker thread, the chunks of input that the event loop
+    puts in the bridge"""
+
+    def __init__(self, bridge: StreamBridge, loop):
+        super().__init__()
+        self.bridge = bridge
+        self.loop = loop
+        self.pending = memoryview(b"")
+        self.eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if not self.pending and not self.eof:
+            chunk = asyncio.run_coroutine_threadsafe(self.bridge.get_input(), self.loop).result()
+            if chunk is None:
+                self.eof = True
+            else:
+                self.pending = memoryview(chunk)
+        n = min(len(b), len(self.pending))
+        b[:n] = self.pending[:n]
+        self.pending = self.pending[n:]
+        return n
+
+
+class StreamOutput(io.RawIOBase):
+    """Writes, from a worker thread, chunks of output to the bridge for
+    the event loop to take.  It cannot seek, like a pipe."""
+
+    def __init__(self, bridge: StreamBridge, loop):
+        super().__init__()
+        self.bridge = bridge
+        self.loop = loop
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        asyncio.run_coroutine_threadsafe(self.bridge.put_output(bytes(b)), self.loop).result()
+        return len(b)
+
+
+async def async_dump(reader, writer, executor=None, options: Options = None, **kwargs):
+    """Dumps what is read from an asyncio.StreamReader, or from an async
+    iterator of chunks of bytes, to an asyncio.StreamWriter.  The options
+    are those of xxd.dump(), or Options from xxd.make_options()."""
+    dumper = make_dumper(options, kwargs, reverse=False)
+    await run_stream(dumper, dumper.mainline, reader, writer, executor)
+
+
+async def async_undump(reader, writer, executor=None, options: Options = None, **kwargs):
+    """Reconstructs the bytes described by a dump that is read from an
+    asyncio.StreamReader, or from an async iterator of chunks of bytes,
+    and writes them to an asyncio.StreamWriter.  As with a pipe, gaps
+    in the dump are written as zeros, and the dump cannot go back."""
+    dumper = make_dumper(options, kwargs, reverse=True)
+    await run_stream(dumper, dumper.mainline_reverse, reader, writer, executor)
+
+
+async def run_stream(dumper, method, reader, writer, executor):
+    """Runs a method of the dumper in the executor, with its input read
+    from the reader and its output written to the writer.  Without an
+    executor, the dumper gets a thread of its own."""
+    loop = asyncio.get_running_loop()
+    bridge = StreamBridge()
+    dumper.fpin = io.BufferedReader(StreamInput(bridge, loop), dumper.block_size)
+    dumper.fpout = StreamOutput(bridge, loop)
+    dumper.sink = OutputSink(dumper.fpout, "block", dumper.block_size)
+
+    def work():
+        try:
+            method()
+            dumper.sink.close()
+        finally:
+            asyncio.run_coroutine_threadsafe(bridge.put_output(None), loop).result()
+
+    # The dumper holds its thread while it waits for the reader and the
+    # writer, so it does not borrow one from the event loop's default
+    # executor, which other dumps and the rest of the program need
+    own_executor = None
+    if executor is None:
+        executor = own_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="xxd")
+    feeder = asyncio.create_task(feed(reader, bridge.inbox, dumper.block_size))
+    worker = loop.run_in_executor(executor, work)
+    try:
+        try:
+            while (data := await bridge.outbox.get()) is not None:
+                writer.write(data)
+                await writer.drain()
+        except BaseException:
+            # Let the worker finish without waiting for the queues, and
+            # report what went wrong here rather than anything it runs into
+            bridge.stop()
+            feeder.cancel()
+            try:
+                await worker
+            except Exception:
+                pass
+            raise
+
+        # The dumper may have stopped before the end of the input, as it
+        # does with -l.  An error reading the input is reported once the
+        # worker has dealt with the input it did get.
+        feeder.cancel()
+        await worker
+        await asyncio.wait([feeder])
+        if not feeder.cancelled():
+            feeder.result()
+    finally:
+        if own_executor is not None:
+            own_executor.shutdown(wait=False)
+
+
+async def feed(reader, inbox: asyncio.Queue, size: int):
+    """Puts chunks of input in the queue, followed by None at the end.
+    The end is marked even if the input cannot be read."""
+    try:
+        if hasattr(reader, "read"):
+            while chunk := await reader.read(size):
+                await inbox.put(chunk)
+        else:
+            async for chunk in reader:
+                if chunk:
+                    await inbox.put(chunk)
+    except Exception:
+        await inbox.put(None)
+        raise
+    await inbox.put(None)
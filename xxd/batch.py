@@ -0,0 +1,151 @@
+import io
+import os
+from collections import deque
+
+from xxd.options import choose_dumper_class
+
+
+def read_names(inputs: list[str], stdin) -> list[str]:
+    """Returns the names of the input files of a batch.  An input that
+    starts with @ is a file that lists more names.  With no inputs at
+    all, the names are read from the binary stream stdin, such as the
+    output of find -print0."""
+    if not inputs:
+        return split_names(stdin.read())
+    names = []
+    for name in inputs:
+        if name.startswith("@"):
+            with open(name[1:], "rb") as fp:
+                names += split_names(fp.read())
+        else:
+            names.append(name)
+    return names
+
+
+def split_names(data: bytes) -> list[str]:
+    """Returns the file names in a list of them, which are separated by
+    NUL characters if there are any, and otherwise one per line"""
+    names = data.split(b"\0") if b"\0" in data else data.splitlines()
+    return [os.fsdecode(name) for name in names if name]
+
+
+def output_name(template: str, path: str, index: int) -> str:
+    """Returns the name of the output file for an input file.  The
+    template can use the fields {path}, {dir}, {name}, {stem} and {index},
+    so that "{dir}/{stem}.hex" puts foo.hex next to foo.bin."""
+    name = os.path.basename(path)
+    try:
+        return template.format(
+            path=path,
+            dir=os.path.dirname(path) or ".",
+            name=name,
+            stem=os.path.splitext(name)[0],
+            index=index,
+        )
+    except (KeyError, IndexError, ValueError) as e:
+        raise ValueError(f"--output-template {template} is not valid: {e}")
+
+
+def batch_header(args: dict, path: str, first: bool) -> bytes:
+    """Returns the header that goes before the dump of a file when all of
+    them are written to one output, as head(1) does.  In C include
+    output the header is a comment."""
+    header = f"/* {path} */\n" if args.get("include", False) else f"==> {path} <==\n"
+    return os.fsencode(header if first else "\n" + header)
+
+
+def run_batch(args: dict, names: list[str], template: str | None, fpout, fperr, jobs: int = 1) -> int:
+    """Dumps each of the named files with the same options, and returns
+    the number of files that could not be dumped.  Each dump is written
+    to the file named by the template, or to fpout after a header if
+    there is no template.  Errors are written to the text stream fperr
+    and do not stop the batch.  With more than one job, a pool of worker
+    processes dumps that many files at a time."""
+    if args.get("reverse", False) and template is None:
+        raise ValueError("-r --batch needs --output-template.")
+    cls = choose_dumper_class(args)
+    arg_list = []
+    for index, path in enumerate(names):
+        outfile = None if template is None else output_name(template, path, index)
+        arg_list.append(dict(args, infile=path, outfile=outfile, jobs=1))
+    if not arg_list:
+        return 0
+
+    # Options that are wrong for every file are reported just once
+    try:
+        cls(arg_list[0])
+    except RuntimeError:
+        pass  # A missing file is reported along with the others
+
+    capture = template is None
+    failures = 0
+    first = True
+    if jobs == 1:
+        # Each dump is written straight to the output as it is made
+        for path, args in zip(names, arg_list):
+            header = batch_header(args, path, first) if capture else b""
+            error = dump_file(cls, args, fpout if capture else None, header)
+            if error is not None:
+                fperr.write(f"{error}\n")
+                failures += 1
+            else:
+                first = False
+        return failures
+
+    for path, args, (output, error) in zip(names, arg_list, batch_results(cls, arg_list, capture, jobs)):
+        if error is not None:
+            fperr.write(f"{error}\n")
+            failures += 1
+            continue
+        if capture:
+            fpout.write(batch_header(args, path, first))
+            fpout.write(output)
+            fpout.flush()
+        first = False
+    return failures
+
+
+def dump_file(cls, args: dict, fpout=None, header: bytes = b"") -> str | None:
+    """Dumps one file of a batch to fpout after the header, or to its
+    output file if fpout is None.  Returns the error message if the file
+    could not be dumped.  Bad options and missing files are found before
+    the header is written."""
+    try:
+        dumper = cls(args)
+        if fpout is not None:
+            fpout.write(header)
+        dumper.run(fpout)
+    except Exception as e:
+        return f"{e}"
+    return None
+
+
+def capture_file(cls, args: dict, capture: bool) -> tuple[bytes, str | None]:
+    """Worker that dumps one file of a batch.  Returns the dump if capture
+    is set, rather than writing it to the output file, and the error
+    message if the file could not be dumped."""
+    fpout = io.BytesIO() if capture else None
+    error = dump_file(cls, args, fpout)
+    output = fpout.getvalue() if capture and error is None else b""
+    return output, error
+
+
+def batch_results(cls, arg_list: list[dict], capture: bool, jobs: int):
+    """Generator that yields the result of capture_file() for each file
+    in order, as a pool of processes works through them.  Only a few
+    files per process are in progress at a time, so that the dumps
+    waiting to be written do not pile up."""
+    from concurrent.futures import ProcessPoolExecutor  # Only needed with --jobs
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        arg_list = iter(arg_list)
+        for args in arg_list:
+            pending.append(executor.submit(capture_file, cls, args, capture))
+            if len(pending) == 2 * jobs:
+                break
+        while pending:
+            result = pending.popleft().result()
+            for args in arg_list:
+                pending.append(executor.submit(capture_file, cls, args, capture))
+                break
+            yield result
@@ -0,0 +1,122 @@
+import errno
+import io
+import os
+
+
+class TextInputAdapter(io.RawIOBase):
+    """Reads a text-only stream, such as a StringIO, as UTF-8 bytes"""
+
+    def __init__(self, fp):
+        super().__init__()
+        self.fp = fp
+        self.pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if not self.pending:
+            self.pending = self.fp.read(len(b)).encode("utf-8")
+        n = min(len(b), len(self.pending))
+        b[:n] = self.pending[:n]
+        self.pending = self.pending[n:]
+        return n
+
+
+class TextOutputAdapter(io.RawIOBase):
+    """Writes bytes to a text-only stream, such as a StringIO, one
+    character per byte"""
+
+    def __init__(self, fp):
+        super().__init__()
+        self.fp = fp
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self.fp.write(bytes(b).decode("latin-1"))
+        return len(b)
+
+    def flush(self):
+        if not self.fp.closed:
+            self.fp.flush()
+
+
+class BufferInput(io.RawIOBase):
+    """Reads from an object that supports the buffer protocol, such as
+    bytes or a memoryview, without copying it first"""
+
+    def __init__(self, buffer):
+        super().__init__()
+        self.view = memoryview(buffer).cast("B")
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = min(len(b), len(self.view) - self.position)
+        b[:n] = self.view[self.position:self.position + n]
+        self.position += n
+        return n
+
+
+class BufferOutput(io.RawIOBase):
+    """Writes into a bytearray as though it were a file.  Seeking past
+    the end and writing there fills the gap with zeros."""
+
+    def __init__(self, buffer: bytearray):
+        super().__init__()
+        self.buffer = buffer
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += len(self.buffer)
+        if offset < 0:
+            raise OSError(errno.EINVAL, "Invalid argument")
+        self.position = offset
+        return offset
+
+    def tell(self) -> int:
+        return self.position
+
+    def write(self, b) -> int:
+        n = len(b)
+        if self.position > len(self.buffer):
+            self.buffer.extend(bytes(self.position - len(self.buffer)))
+        self.buffer[self.position:self.position + n] = b
+        self.position += n
+        return n
+
+
+def binary_input(fp):
+    """Returns a binary stream that reads from fp.  Text streams are read
+    through their underlying binary buffer if they have one."""
+    if not isinstance(fp, io.TextIOBase):
+        return fp
+    buffer = getattr(fp, "buffer", None)
+    if buffer is not None:
+        return buffer
+    return io.BufferedReader(TextInputAdapter(fp))
+
+
+def binary_output(fp):
+    """Returns a binary stream that writes to fp.  Text streams are written
+    through their underlying binary buffer if they have one."""
+    if not isinstance(fp, io.TextIOBase):
+        return fp
+    buffer = getattr(fp, "buffer", None)
+    if buffer is not None:
+        fp.flush()  # Anything already written as text goes first
+        return buffer
+    return TextOutputAdapter(fp)
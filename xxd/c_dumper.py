@@ -1,13 +1,35 @@
+import os
+import re
 import string
+from binascii import unhexlify
 
 from xxd import Dumper
+from xxd.parallel import run_dumpers
+
+# The hex literal of every byte value, and its escape in a string literal
+C_LITERALS = [b"0x%02x" % c for c in range(256)]
+STRING_ESCAPES = [b"\\x%02x" % c for c in range(256)]
+
+# A hex literal in a C array, the name of the array at the end of its
+# heading, and the variable that holds the array length, which is
+# upper case with -C
+C_LITERAL = re.compile(rb"\b0[xX]([0-9a-fA-F]{2})\b")
+C_HEADING = re.compile(rb"(\w+)\s*\[\s*\]\s*=\s*$")
+C_LENGTH = re.compile(rb"(\w+_len)\s*=\s*(\d+)", re.IGNORECASE)
+
+# Most input after the end of the array that is searched for its length
+MAX_TRAILER = 4096
 
 
 class CDumper(Dumper):
     """Works with C include format"""
 
+    segment_separator = b",\n"
+
     def __init__(self, args):
         super().__init__(args)
+        if self.include_style == "string":
+            self.segment_separator = b"\n"
 
     def get_default_columns(self) -> int:
         return 12
@@ -15,20 +37,8 @@ class CDumper(Dumper):
     def get_default_octets_per_group(self) -> int:
         return 0
 
-    def mainline(self):
-        super().mainline()  # Important!
-
-        # Function used within this block that writes either
-        # a string or bytes. This avoids having to write the
-        # logic in every self.fpout.write() in this block.
-        def write_line(line):
-            try:
-                self.fpout.write(line)
-            except TypeError:
-                line = bytes(line.encode("utf-8"))
-                self.fpout.write(line)
-
-        # Print the C array heading
+    def get_varnames(self) -> tuple[str, str]:
+        """Returns the names of the array and of its length variable"""
         varname = self.infile if not self.name else self.name
 
         # Ensure that this is a valid C variable name
@@ -36,54 +46,220 @@ class CDumper(Dumper):
 
         if self.capitalize:
             varname = varname.upper()
-
-        # The varname is now cifyied
-        line = f"unsigned char {varname}[] = {{" + "\n"
-        write_line(line)
-        self.fpout.flush()
-
-        # Read bytes and write them as hex literals,
-        # writing output lines at every self.cols boundary
-        # and at end of file
-        n = 0
-        cinc = []
-        c = self.fpin.read(1)
-        while len(c) > 0:
-            if self.length is not None:
-                if n >= self.length:
-                    break
-            n += 1
-            hex_literal = "0x" + format(ord(c), "02x")
-            cinc.append(hex_literal)
-            if n % self.cols == 0:
-                line = "  " + ", ".join(cinc)
-                cinc.clear()
-                write_line(line)
-            c = self.fpin.read(1)
-            if n % self.cols == 0:
-                if len(c) == 0:
-                    write_line("\n")
-                else:
-                    if hasattr(self, 'length') and self.length == n:
-                        write_line("\n")
-                    else:
-                        write_line(",\n")
-        if len(cinc) > 0:
-            line = "  " + ", ".join(cinc)
-            write_line(line + "\n")
-        write_line("};\n")
-        self.fpout.flush()
-
-        # Now write array length
         varname_len = f"{varname}_len"
         if self.capitalize:
             varname_len = varname_len.upper()
-        line = f"unsigned int {varname_len} = {n};\n"
-        write_line(line)
-        self.fpout.flush()
+        return varname, varname_len
+
+    def iter_output(self):
+        """Generator that yields the C source: the array and its length,
+        or whatever the include style or chunk size calls for"""
+        varname, varname_len = self.get_varnames()
+        if self.chunk_size is not None:
+            yield from self.iter_chunks(varname, varname_len)
+            return
+        if self.include_style == "embed":
+            yield from self.iter_embed(varname, varname_len)
+            return
+        if self.include_style == "incbin":
+            yield from self.iter_incbin(varname, varname_len)
+            return
+
+        # The C array heading
+        if self.include_style == "string":
+            yield f"unsigned char {varname}[] =\n".encode("utf-8")
+        else:
+            yield f"unsigned char {varname}[] = {{\n".encode("utf-8")
+
+        # The rows of hex literals with a comma after every row
+        # but the last one, or the rows of string literals
+        rows = False
+        for segment in self.segments():
+            if rows:
+                yield self.segment_separator + segment
+            else:
+                yield segment
+            rows = True
+        if self.include_style == "string":
+            yield b"\n  ;\n" if rows else b'  ""\n  ;\n'
+        else:
+            yield b"\n};\n" if rows else b"};\n"
+
+        # Now the array length
+        yield f"unsigned int {varname_len} = {self.so_far};\n".encode("utf-8")
+
+    def iter_chunks(self, varname: str, varname_len: str):
+        """Generator that writes the input as a separate C file for each
+        chunk of --chunk-size bytes, and yields a header with a table of
+        the chunks.  Chunk k is the array varname_k in the file named
+        after the output file with _k added, and is written as -i would
+        write it.  With --jobs, the chunk files are written in parallel."""
+        size = os.path.getsize(self.infile)
+        start = min(self.start_offset(size), size)
+        stop = size if self.length is None else min(size, start + self.length)
+        starts = range(start, stop, self.chunk_size) or [start]
+        root = os.path.splitext(self.outfile)[0]
+        names = [f"{varname}_{k}" for k in range(len(starts))]
+        lengths = [min(self.chunk_size, stop - i) for i in starts]
+        arg_list = [
+            dict(self.args, seek=i, len=n, outfile=f"{root}_{k}.c", name=names[k], chunk_size=None, jobs=1)
+            for k, (i, n) in enumerate(zip(starts, lengths))
+        ]
+        run_dumpers(type(self), arg_list, self.jobs)
+        self.so_far = stop - start
+
+        def suffix(text: str) -> str:
+            return text.upper() if self.capitalize else text
+
+        lines = [f"/* {varname}: {stop - start} bytes in {len(names)} chunks */"]
+        lines += [f"extern unsigned char {name}[];" for name in names]
+        lines.append(f"static unsigned char * const {varname}{suffix('_chunks')}[] = {{")
+        lines.append(",\n".join(f"  {name}" for name in names))
+        lines.append("};")
+        lines.append(f"static const unsigned int {varname}{suffix('_chunk_lens')}[] = {{")
+        lines.append(",\n".join(f"  {n}" for n in lengths))
+        lines.append("};")
+        lines.append(f"static const unsigned int {varname}{suffix('_chunk_count')} = {len(names)};")
+        lines.append(f"static const unsigned int {varname_len} = {stop - start};")
+        yield "".join(line + "\n" for line in lines).encode("utf-8")
+
+    def included_path(self, relative: bool) -> str:
+        """Returns the path by which #embed or .incbin finds the input
+        file.  A quoted #embed is looked up from the directory of the
+        file that contains it, so with relative set, the path is relative
+        to the directory of the output file, if there is one.  Otherwise
+        the path is absolute, as the assembler looks up .incbin from
+        wherever it is run."""
+        path = os.path.abspath(self.infile)
+        if relative and isinstance(self.outfile, str) and self.outfile != '-':
+            try:
+                return os.path.relpath(path, os.path.dirname(os.path.abspath(self.outfile)))
+            except ValueError:
+                pass  # On another drive, so only an absolute path will do
+        return path
+
+    def iter_embed(self, varname: str, varname_len: str):
+        """Generator that yields an array that the compiler fills from the
+        input file with a C23 #embed directive, which names the input file
+        relative to the output file"""
+        limit = f" limit({self.length})" if self.length is not None else ""
+        path = self.included_path(relative=True)
+        lines = [
+            f"unsigned char {varname}[] = {{",
+            f"#embed {c_string(path)}{limit}",
+            "};",
+            f"unsigned int {varname_len} = sizeof({varname});",
+        ]
+        yield "".join(line + "\n" for line in lines).encode("utf-8")
+
+    def iter_incbin(self, varname: str, varname_len: str):
+        """Generator that yields GNU assembler source that includes the
+        input file with .incbin, with symbols for its start, end and length.
+        The input file is named by its absolute path.  The source ends with
+        an empty .note.GNU-stack section, without which the linker would
+        give the program an executable stack."""
+        varname_end = f"{varname}_END" if self.capitalize else f"{varname}_end"
+        skip = self.start_offset(os.path.getsize(self.infile))
+        count = f", {self.length}" if self.length is not None else ""
+        path = self.included_path(relative=False)
+        lines = [
+            "\t.section .rodata",
+            f"\t.global {varname}",
+            f"\t.global {varname_end}",
+            f"\t.global {varname_len}",
+            f"{varname}:",
+            f"\t.incbin {c_string(path)}, {skip}{count}",
+            f"{varname_end}:",
+            "\t.balign 4",
+            f"{varname_len}:",
+            f"\t.int {varname_end} - {varname}",
+            '\t.section .note.GNU-stack,"",@progbits',
+        ]
+        yield "".join(line + "\n" for line in lines).encode("utf-8")
+
+    def iter_segments(self):
+        """Generator that reads the input in large blocks and yields their
+        rows of hex literals, with a row at every self.cols boundary and
+        at end of file.  Each byte is looked up in a table of literals,
+        and every row is joined in one call.  In the string style, the
+        rows are string literals of escaped bytes instead."""
+        cols = self.cols or self.get_default_columns()  # As in xxd
+        if self.include_style == "string":
+            table, start, sep, end = STRING_ESCAPES, b'  "', b"", b'"'
+        else:
+            table, start, sep, end = C_LITERALS, b"  ", b", ", b""
+        for block in self.read_blocks(cols):
+            literals = list(map(table.__getitem__, block))
+            yield self.segment_separator.join([
+                start + sep.join(literals[i:i + cols]) + end
+                for i in range(0, len(literals), cols)
+            ])
+            self.so_far += len(block)
 
     def mainline_reverse(self):
-        raise RuntimeError("-r option is not supported for C include files")
+        """Reconstructs the original file from the hex literals of a C
+        array.  The input is read in chunks of --block-size bytes, and the
+        literals in each chunk are found with a single regular expression
+        scan and converted all at once.  Input without the array heading,
+        as xxd -i writes for standard input, is just a list of literals.
+        If the array is followed by its length variable, the number of
+        bytes is checked against it.  The variable is the name of the
+        array with _len added, in either case."""
+        offset = self.seek or 0
+        length = 0  # Number of bytes in the array
+        text = b""  # Input that has not been scanned yet
+        in_array = False
+        c_length = C_LENGTH  # Finds the length variable of the array
+        trailer = None  # Input after the end of the array
+        while chunk := self.fpin.read(self.block_size):
+            if trailer is not None:
+                trailer += chunk[:MAX_TRAILER - len(trailer)]
+                continue
+            text += chunk
+            if not in_array:
+                # Skip the heading up to the opening brace, or start at
+                # the first literal if there is no heading
+                brace = text.find(b"{")
+                literal = C_LITERAL.search(text)
+                if literal and (brace < 0 or literal.start() < brace):
+                    text = text[literal.start():]
+                elif brace >= 0:
+                    heading = C_HEADING.search(text, 0, brace)
+                    if heading:
+                        name = re.escape(heading.group(1))
+                        c_length = re.compile(rb"\b(" + name + rb"_(?i:len))\s*=\s*(\d+)")
+                    text = text[brace + 1:]
+                else:
+                    # Keep what could be the start of a literal, or the
+                    # name in the heading
+                    text = text[-MAX_TRAILER:]
+                    continue
+                in_array = True
+
+            # Scan up to the closing brace, or up to the last complete
+            # literal, which is followed by a comma
+            end = text.find(b"}")
+            stop = end if end >= 0 else text.rfind(b",") + 1
+            data = unhexlify(b"".join(C_LITERAL.findall(text, 0, stop)))
+            if data:
+                self.write_at(offset + length, data)
+                length += len(data)
+            if end >= 0:
+                trailer = text[end + 1:end + 1 + MAX_TRAILER]
+            text = text[stop:]
+
+        if in_array and trailer is None:
+            # No closing brace, so the rest of the input is literals
+            data = unhexlify(b"".join(C_LITERAL.findall(text)))
+            if data:
+                self.write_at(offset + length, data)
+                length += len(data)
+
+        # Check the array length
+        match = c_length.search(trailer or b"")
+        if match and int(match.group(2)) != length:
+            name = match.group(1).decode("latin-1")
+            raise RuntimeError(f"Sorry, the array has {length} bytes but {name} is {int(match.group(2))}.")
 
     @staticmethod
     def convert_to_valid_c_variable_name(varname):
@@ -101,3 +277,8 @@ class CDumper(Dumper):
                 valid.append("_")
         varname = "".join(valid)
         return varname
+
+
+def c_string(text: str) -> str:
+    """Returns text as a quoted C string literal, as used for file names"""
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
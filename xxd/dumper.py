@@ -1,69 +1,126 @@
+import errno
+import io
+import mmap
 import os
+import stat
 import sys
 from abc import ABC, abstractmethod
 from io import UnsupportedOperation
 
-from xxd import HexType, COLS
+from xxd import HexType, COLS, BLOCK_SIZE
+from xxd.binary_io import binary_input, binary_output
+from xxd.numpy_formatter import HAVE_NUMPY
+from xxd.options import Options, OPTION_NAMES
+from xxd.output_sink import OutputSink, FLUSH_POLICIES
+from xxd.parallel import split_input, parallel_segments
+
+# Ways of writing C include output: an array of hex literals, string
+# literals of escaped bytes, a C23 #embed directive, or GNU assembler
+INCLUDE_STYLES = ["array", "string", "embed", "incbin"]
 
 
 class Dumper(ABC):
     """Base class for hex dumpers of the three formats"""
 
-    def __init__(self, args: dict):
+    # Output that goes between the segments yielded by iter_segments()
+    segment_separator = b""
+
+    def __init__(self, args: dict | Options):
         """Creates a new XXD object with specified options.
         Note that defaults are implemented here by the dictionary 'get(key, default)' approach.
         Incompatible options raise a ValueError.
+        Options that have already been checked are used as they are.
         """
-        self.args = args if args else {}
+        if isinstance(args, Options):
+            self.args = dict(args.args)
+            for name in OPTION_NAMES:
+                setattr(self, name, getattr(args, name))
+            self.formatter = args.formatter
+        else:
+            self.args = args if args else {}
+            self.set_options(self.args)
+            self.formatter = None
+
+        # The state of a run, also in alphabetic order
+        self.file_offset = None
+        self.fpin = None
+        self.fpout = None
+        self.mapping = None
+        self.output_offset = 0
+        self.position = None
+        self.sink = None
+        self.so_far = None
+        self.source = None
+        self.zero_run_count = 0
+        self.zero_run_offset = None
 
-        # Remaining members are initialized here in alphabetic order.
+    def set_options(self, args: dict):
+        """Checks the arguments and sets the members that hold the options"""
+
+        # Members are initialized here in alphabetic order.
         # There should be no dependencies on order
         self.autoskip: bool = args.get("autoskip", False)
-        self.autoskip_lines = None
-        self.autoskip_state = None
         self.binary: bool = self.set_binary(args)
+        self.block_size = self.set_block_size(args)
         self.capitalize: bool = args.get("capitalize", False)
+        self.chunk_size = self.set_chunk_size(args)
         self.cols = self.set_columns(args)
         self.decimal: bool = args.get("decimal", False)
         self.EBCDIC: bool = args.get("EBCDIC", False)
-        self.file_offset = None
-        self.fpin = None
-        self.fpout = None
+        self.engine: str = self.set_engine(args)
+        self.flush_policy: str = self.set_flush_policy(args)
         self.hextype = self.set_hextype(args)
         self.include: bool = args.get("include", False)
+        self.include_style: str = self.set_include_style(args)
         self.infile = self.set_infile(args)
+        self.jobs = self.set_jobs(args)
         self.length = self.set_length(args)
         self.little_endian: bool = self.set_little_endian(args)
         self.name: str = args.get("name", None)
         self.octets_per_group = self.set_octets_per_group(args)
         self.offset = self.set_offset(args)
         self.outfile: str = args.get("outfile", None)
+        self.patch: bool = self.set_patch(args)
         self.postscript: bool = args.get("postscript", False)
         self.reverse: bool = args.get("reverse", False)
         self.seek = self.set_seek(args)
-        self.so_far = None
+        self.seek_whence = self.set_seek_whence(args)
         self.uppercase: bool = args.get("uppercase", False)
         self.version: bool = args.get("version", False)
 
-    def run(self):
-        """Calls mainline with specified input and output files"""
+    def run(self, fpout=None):
+        """Calls mainline with specified input and output files.  A binary
+        output stream can be given instead of the output file, and is
+        left open."""
 
         # Check for infile.  If not specified, or if it is "-", use stdin.
         # Otherwise, try to open the file.
         # If outfile is specified, open it for writing, otherwise, use stdout.
 
+        # Both files are always binary. Standard input and output are
+        # read and written through their underlying binary buffers.
+
         self.fpin = None
         self.fpout = None
+        close_fpout = False
         try:
-            if self.infile is None or self.infile == sys.stdin or self.infile == '-':
-                self.fpin = sys.stdin
-            else:
-                self.fpin = open(self.infile, "rb")
+            self.open_input()
 
-            if self.outfile is None or self.outfile == sys.stdout:
-                self.fpout = sys.stdout
+            if fpout is not None:
+                self.fpout = fpout
+            elif self.outfile is None or self.outfile == sys.stdout:
+                self.fpout = binary_output(sys.stdout)
             else:
-                self.fpout = open(self.outfile, "wb")
+                # A patch leaves the rest of the output file as it was
+                self.fpout = open(self.outfile, "r+b" if self.patch else "wb")
+                close_fpout = True
+
+            # Batch the output, flushing every line only if asked to
+            # or if someone is watching it on a terminal
+            flush_policy = self.flush_policy
+            if flush_policy is None:
+                flush_policy = "line" if self.fpout.isatty() else "block"
+            self.sink = OutputSink(self.fpout, flush_policy, self.block_size)
 
             # Run the mainline
             if self.reverse:
@@ -73,28 +130,99 @@ class Dumper(ABC):
 
         # Close the files
         finally:
-            if self.fpin is not None:
-                if self.fpin != sys.stdin:
-                    self.fpin.close()
+            self.close_input()
+            if self.sink is not None:
+                self.sink.close()
             if self.fpout is not None:
                 self.fpout.flush()
-                if self.fpout != sys.stdout:
+                if close_fpout:
                     self.fpout.close()
 
+    def open_input(self):
+        """Opens the input file.  A regular file that is to be dumped is
+        also mapped into memory, so that it can be sliced rather than read."""
+        if self.infile is None or self.infile == sys.stdin or self.infile == '-':
+            self.fpin = binary_input(sys.stdin)
+            return
+        self.fpin = open(self.infile, "rb")
+        if not self.reverse:
+            try:
+                if stat.S_ISREG(os.fstat(self.fpin.fileno()).st_mode):
+                    self.mapping = mmap.mmap(self.fpin.fileno(), 0, access=mmap.ACCESS_READ)
+                    self.source = memoryview(self.mapping)
+            except (OSError, ValueError):
+                pass  # Empty files cannot be mapped.  Read them instead.
+
+    def close_input(self):
+        """Closes the input file, unless it is standard input"""
+        if self.source is not None:
+            self.source.release()
+            self.source = None
+        if self.mapping is not None:
+            try:
+                self.mapping.close()
+            except BufferError:
+                pass  # A block is still in use.  The mapping closes when it is freed.
+            self.mapping = None
+        if self.fpin is not None and self.infile not in [None, '-', sys.stdin]:
+            self.fpin.close()
+
     @staticmethod
     def set_binary(args) -> bool:
-        """Binary option is incompatible with -ps, -i, or -r"""
+        """Binary option is incompatible with -ps or -i"""
         binary: bool = args.get("binary", False)
         if binary:
             if type(binary) != bool:
                 raise ValueError(f"-b option '{binary}' is not True or False")
-            for other in ["postscript", "include", "reverse"]:
+            for other in ["postscript", "include"]:
                 if other in args.keys() and args[other]:
-                    raise ValueError("-b option is incompatible with -ps, -i, or -r.")
+                    raise ValueError("-b option is incompatible with -ps or -i.")
         return binary
 
+    @staticmethod
+    def set_block_size(args) -> int:
+        """Returns the number of bytes to read from the input at a time"""
+        block_size = args.get("block_size", None)
+        if block_size is None:
+            return BLOCK_SIZE
+        try:
+            if type(block_size) != int:
+                block_size = int(block_size, 0)
+        except ValueError as e:
+            errmsg = f"--block-size {block_size} is not numeric"
+            raise ValueError(errmsg)
+        if block_size < 1:
+            raise ValueError(f"--block-size {block_size} is not a positive integer")
+        return block_size
+
+    @staticmethod
+    def set_chunk_size(args) -> int | None:
+        """Returns the number of bytes in each chunk file of C include
+        output, or None to write a single array.  Chunks need -i with an
+        array or string style, and named input and output files."""
+        chunk_size = args.get("chunk_size", None)
+        if chunk_size is None:
+            return None
+        try:
+            if type(chunk_size) != int:
+                chunk_size = int(chunk_size, 0)
+        except ValueError as e:
+            errmsg = f"--chunk-size {chunk_size} is not numeric"
+            raise ValueError(errmsg)
+        if chunk_size < 1:
+            raise ValueError(f"--chunk-size {chunk_size} is not a positive integer")
+        if not args.get("include", False) or args.get("reverse", False):
+            raise ValueError("--chunk-size only works with -i, and not with -r.")
+        if args.get("include_style", None) in ["embed", "incbin"]:
+            raise ValueError(f"--chunk-size does not work with --include-style {args['include_style']}.")
+        for name in ["infile", "outfile"]:
+            if args.get(name, None) in [None, '-']:
+                raise ValueError(f"--chunk-size needs an {name[:-4]}put file.")
+        return chunk_size
+
     def set_columns(self, args) -> int:
-        """Cols option has different defaults depending on whether -ps or -i have been specified"""
+        """Cols option has different defaults depending on whether -ps or -i have been specified.
+        Only -ps lines can be wider than COLS."""
         cols = self.get_default_columns()
         if "cols" in args:  # See if an override was specified
             attr_cols = args.get("cols", None)
@@ -108,10 +236,32 @@ class Dumper(ABC):
                     raise ValueError(errmsg)
                 if cols < 0:
                     raise ValueError(f"-c {attr_cols} is not a non-negative integer")
-        if cols > COLS:
+        if cols > COLS and not args.get("postscript", False):
             raise ValueError(f"Number of columns {cols} cannot be greater than {COLS}")
         return cols
 
+    @staticmethod
+    def set_engine(args) -> str:
+        """Returns the formatting engine, which is "numpy" only if
+        NumPy is installed, unless "python" was asked for"""
+        engine = args.get("engine", None)
+        if engine is None or engine == "auto":
+            return "numpy" if HAVE_NUMPY else "python"
+        if engine not in ["python", "numpy"]:
+            raise ValueError(f"--engine {engine} is not one of auto, python, or numpy")
+        if engine == "numpy" and not HAVE_NUMPY:
+            raise ValueError("--engine numpy requires NumPy, which is not installed")
+        return engine
+
+    @staticmethod
+    def set_flush_policy(args) -> str | None:
+        """Returns the flush policy, or None to choose one when the
+        output file is known"""
+        flush_policy = args.get("flush", None)
+        if flush_policy is not None and flush_policy not in FLUSH_POLICIES:
+            raise ValueError(f"--flush {flush_policy} is not one of {', '.join(FLUSH_POLICIES)}")
+        return flush_policy
+
     @staticmethod
     def set_hextype(args):
         """Returns the element of HexType needed for this type of output"""
@@ -126,6 +276,29 @@ class Dumper(ABC):
             hextype = HexType.HEX_LITTLEENDIAN
         return hextype
 
+    @staticmethod
+    def set_include_style(args) -> str:
+        """Returns the style of C include output.  Styles other than the
+        array need -i.  #embed and .incbin name the input file, so they
+        need one, and cannot be reversed."""
+        include_style = args.get("include_style", None)
+        if include_style is None:
+            return "array"
+        if include_style not in INCLUDE_STYLES:
+            raise ValueError(f"--include-style {include_style} is not one of {', '.join(INCLUDE_STYLES)}")
+        if include_style != "array":
+            if not args.get("include", False):
+                raise ValueError(f"--include-style {include_style} only works with -i.")
+            if args.get("reverse", False):
+                raise ValueError(f"-r does not work with --include-style {include_style}.")
+        if include_style in ["embed", "incbin"]:
+            infile = args.get("infile", None)
+            if infile is None or infile == '-':
+                raise ValueError(f"--include-style {include_style} needs an input file.")
+            if include_style == "embed" and args.get("seek", None) is not None:
+                raise ValueError("-s does not work with --include-style embed.")
+        return include_style
+
     def set_infile(self, args):
         """Returns the input file name after checking to ensure the file exists"""
         infile: str = args.get("infile", None)
@@ -135,6 +308,22 @@ class Dumper(ABC):
                 raise RuntimeError(f"{pname}: {infile}: No such file or directory")
         return infile
 
+    @staticmethod
+    def set_jobs(args) -> int:
+        """Returns the number of worker processes that format the output"""
+        jobs = args.get("jobs", None)
+        if jobs is None:
+            return 1
+        try:
+            if type(jobs) != int:
+                jobs = int(jobs, 0)
+        except ValueError as e:
+            errmsg = f"--jobs {jobs} is not numeric"
+            raise ValueError(errmsg)
+        if jobs < 1:
+            raise ValueError(f"--jobs {jobs} is not a positive integer")
+        return jobs
+
     def set_length(self, args):
         """Returns the length attribute as an integer.
         Translated from a hex literal if necessary."""
@@ -153,12 +342,12 @@ class Dumper(ABC):
 
     def set_little_endian(self, args):
         """Returns the value of the little endian option.
-        The little endian option is incompatible with -ps, -i, or -r"""
+        The little endian option is incompatible with -ps, -i, or -b"""
         little_endian: bool = args.get("little_endian", False)
         if little_endian:
-            for other in ["postscript", "include", "reverse"]:
-                if other in args.keys():
-                    raise ValueError("-e option is incompatible with -ps, -i, or -r.")
+            for other in ["postscript", "include", "binary"]:
+                if other in args.keys() and args[other]:
+                    raise ValueError("-e option is incompatible with -ps, -i, or -b.")
         return little_endian
 
     def set_octets_per_group(self, args) -> int:
@@ -182,6 +371,8 @@ class Dumper(ABC):
                 raise ValueError(errmsg)
             if octets_per_group < 0:
                 raise ValueError(f"-o {attr_octets_per_group} is not a non-negative integer")
+        if self.little_endian and octets_per_group & (octets_per_group - 1):
+            raise ValueError("number of octets per group must be a power of 2 with -e.")
         return octets_per_group
 
     def set_offset(self, args) -> int | None:
@@ -199,21 +390,53 @@ class Dumper(ABC):
             raise ValueError(f"{offset} is not a non-negative integer")
         return offset
 
+    @staticmethod
+    def set_patch(args) -> bool:
+        """Returns the value of the patch option.  Patching only works with
+        -r, and needs an existing output file."""
+        patch: bool = args.get("patch", False)
+        if patch:
+            if not args.get("reverse", False):
+                raise ValueError("--patch only works with -r.")
+            outfile = args.get("outfile", None)
+            if outfile is None or outfile == '-':
+                raise ValueError("--patch needs an output file to patch.")
+            if not os.path.exists(outfile):
+                pname = os.path.basename(sys.argv[0])
+                raise RuntimeError(f"{pname}: {outfile}: No such file or directory")
+        return patch
+
     def set_seek(self, args) -> int | None:
-        """Sets the seek attribute if specified in the arguments"""
+        """Sets the seek attribute if specified in the arguments.
+        As in xxd, "+N" is relative to the current position of the input
+        and "-N" is relative to its end, so the result may be negative."""
         seek = args.get("seek", None)
         if seek is None:
             return None
         try:
             if type(seek) != int:
-                seek = int(seek, 0)
+                seek = int(seek.removeprefix("+"), 0)
         except ValueError as e:
             errmsg = f"-s {seek} is not numeric"
             raise ValueError(errmsg)
-        if seek < 0:
-            raise ValueError(f"{seek} is not a non-negative integer")
         return seek
 
+    @staticmethod
+    def set_seek_whence(args) -> int:
+        """Returns what the seek attribute is relative to: the start of
+        the input, its current position ("+N"), or its end ("-N")"""
+        seek = args.get("seek", None)
+        if type(seek) == int:
+            return os.SEEK_END if seek < 0 else os.SEEK_SET
+        if seek is None:
+            return os.SEEK_SET
+        seek = seek.strip()
+        if seek.startswith("+"):
+            return os.SEEK_CUR
+        if seek.startswith("-"):
+            return os.SEEK_END
+        return os.SEEK_SET
+
     @staticmethod
     def data_format(b: int, hextype: HexType) -> str:
         """Converts a byte to a hex or binary string"""
@@ -223,25 +446,222 @@ class Dumper(ABC):
             result = format(b, "02x")
         return result
 
-    @abstractmethod
-    def mainline(self):
-        """Runs the dumper"""
+    def read_blocks(self, align: int = 1, skip_holes: bool = False):
+        """Generator that reads the input in large blocks, honoring the
+        length limit, if any.
+
+        If the input is mapped into memory, the blocks are slices of it.
+        With skip_holes, holes in a sparse input file are not read at all.
+        Instead, the number of bytes in the hole, rounded down to a multiple
+        of 'align', is yielded as an int.
 
+        Otherwise, a single buffer is allocated and refilled with
+        readinto1(), so each block yielded is a memoryview that is only
+        valid until the next one is requested.  A block holds whatever
+        whole lines have arrived, rather than waiting for the buffer to
+        fill, so that input typed at a terminal or trickling through a
+        pipe is shown as it comes.  Every block except the last is a
+        multiple of 'align' bytes long, so that callers can cut it into
+        whole lines.
+        """
+        size = max(align, self.block_size - self.block_size % align)
+        if self.source is not None:
+            # The input is mapped into memory, so blocks are just slices of it
+            stop = len(self.source)
+            if self.length is not None:
+                stop = min(stop, self.position + self.length)
+            start = self.position
+            while start < stop:
+                hole = self.hole_length(start, stop, align) if skip_holes else 0
+                if hole:
+                    yield hole
+                    start += hole
+                else:
+                    yield self.source[start:min(start + size, stop)]
+                    start = min(start + size, stop)
+            self.position = max(self.position, stop)
+            return
+
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        readinto = getattr(self.fpin, "readinto1", self.fpin.readinto)
+        remaining = self.length
+        filled = 0
+        while True:
+            want = size - filled
+            if remaining is not None:
+                want = min(want, remaining)
+            n = readinto(view[filled:filled + want]) if want else 0
+            if not n:
+                if filled:
+                    yield view[:filled]
+                return
+            if remaining is not None:
+                remaining -= n
+            filled += n
+            usable = filled - filled % align
+            if usable:
+                yield view[:usable]
+                rest = filled - usable
+                view[:rest] = view[usable:filled]
+                filled = rest
+
+    def seek_input(self):
+        """Skips to the starting point in the input file given by -s"""
         self.file_offset = 0
         self.so_far = 0
-        if self.seek is not None:
-            seek = self.seek
+        if self.source is not None:
+            # With the input in memory, seeking is just indexing
+            self.file_offset = self.start_offset(len(self.source))
+            self.position = min(self.file_offset, len(self.source))
+        elif self.seek is not None:
             try:
-                self.fpin.seek(seek)
+                self.file_offset = self.fpin.seek(self.seek, self.seek_whence)
             except UnsupportedOperation as e:
-                for i in range(seek):
-                    self.fpin.read(1)
-            self.file_offset += seek
+                self.file_offset = self.skip_input()
+            except OSError as e:
+                if e.errno != errno.ESPIPE:
+                    # Such as going back past the start of the file
+                    raise RuntimeError("Sorry, cannot seek.")
+                self.file_offset = self.skip_input()
+
+    def start_offset(self, size: int) -> int:
+        """Returns where -s starts the dump in a newly opened input file
+        of the specified size"""
+        if self.seek is None:
+            return 0
+        offset = size + self.seek if self.seek_whence == os.SEEK_END else self.seek
+        if offset < 0:
+            raise RuntimeError("Sorry, cannot seek.")
+        return offset
+
+    def skip_input(self) -> int:
+        """Skips to the starting point in an input that cannot seek, such as
+        a pipe, and returns the file offset there.  Skipped bytes are read
+        a block at a time and thrown away.  To start at some distance from
+        the end, only that many bytes are kept, and they become the input."""
+        if self.seek < 0 and self.seek_whence != os.SEEK_END:
+            raise RuntimeError("Sorry, cannot seek backwards.")
+
+        if self.seek_whence != os.SEEK_END:
+            # No need to read past the starting point
+            buffer = memoryview(bytearray(min(self.block_size, self.seek) or 1))
+            remaining = self.seek
+            while remaining > 0:
+                n = self.fpin.readinto(buffer[:min(len(buffer), remaining)])
+                if not n:
+                    break
+                remaining -= n
+            return self.seek
+
+        # The whole input is read a block at a time, however little of
+        # it is kept
+        buffer = memoryview(bytearray(self.block_size))
+        keep = -self.seek
+        tail = bytearray()
+        total = 0
+        while n := self.fpin.readinto(buffer):
+            total += n
+            tail += buffer[max(0, n - keep):n]
+            if len(tail) > keep:
+                del tail[:len(tail) - keep]
+        if total < keep:
+            raise RuntimeError("Sorry, cannot seek.")
+        self.fpin = io.BytesIO(tail)
+        return total - keep
+
+    def seek_output(self, target: int):
+        """Moves the output to target, counted from where the output
+        started.  Output that can seek skips any gap, which leaves a hole
+        in a file.  Other output, such as a pipe, has the gap filled with
+        zeros, and cannot go backwards."""
+        position = self.output_offset
+        if target == position:
+            return
+        self.sink.drain()
+        self.output_offset = target
+        try:
+            self.fpout.seek(target - position, os.SEEK_CUR)
+            return
+        except (OSError, UnsupportedOperation):
+            pass
+        if target < position:
+            raise RuntimeError("Sorry, cannot seek backwards.")
+        zeros = bytes(min(self.block_size, target - position))
+        while position < target:
+            n = min(len(zeros), target - position)
+            self.sink.write(zeros[:n])
+            position += n
+
+    def write_at(self, offset: int, data):
+        """Writes reconstructed data at an offset in the output.  A patch
+        writes straight into the output file with os.pwrite(), which
+        leaves the rest of the file alone."""
+        if self.patch:
+            if offset < 0:
+                raise RuntimeError("Sorry, cannot seek.")
+            fd = self.fpout.fileno()
+            while data:
+                n = os.pwrite(fd, data, offset)
+                data = data[n:]
+                offset += n
+            return
+        self.seek_output(offset)
+        self.sink.write(data)
+        self.sink.end_block()
+        self.output_offset += len(data)
+
+    def segments(self):
+        """Returns an iterator over the output segments, which are formatted
+        by a pool of worker processes if --jobs was given and the input
+        is a regular file"""
+        ranges = split_input(self) if self.jobs > 1 else None
+        if ranges is None:
+            return self.iter_segments()
+        return parallel_segments(self, ranges)
+
+    def hole_length(self, start: int, stop: int, align: int) -> int:
+        """Returns the length of the hole that starts at 'start' in a sparse
+        input file, rounded down to a multiple of 'align', or zero if there
+        is no hole there or the system cannot find holes.  Only a mapped
+        input file can have holes."""
+        if not hasattr(os, "SEEK_DATA") or self.mapping is None:
+            return 0
+        try:
+            data = os.lseek(self.fpin.fileno(), start, os.SEEK_DATA)
+        except OSError as e:
+            if e.errno != errno.ENXIO:
+                return 0
+            data = stop  # The rest of the file is a hole
+        length = min(data, stop) - start
+        return length - length % align
+
+    @abstractmethod
+    def iter_segments(self):
+        """Generator that reads the input from its current position and
+        yields the formatted output in segments"""
+
+    @abstractmethod
+    def iter_output(self):
+        """Generator that yields the whole output of the dumper, from the
+        starting point in the input, in chunks of bytes"""
+
+    def mainline(self):
+        """Runs the dumper, sending its output to the output sink"""
+        self.seek_input()
+        for output in self.iter_output():
+            self.sink.write(output)
+            self.sink.end_block()
 
     @abstractmethod
     def mainline_reverse(self):
         """Recreates original file from the hex output"""
 
+    def get_formatter(self):
+        """Returns the line formatter for this dump, or None if the output
+        type does not use one"""
+        return None
+
     @abstractmethod
     def get_default_columns(self) -> int:
         """Returns the default number of columns for this output type"""
@@ -1,7 +1,26 @@
-import os.path
+import os
 import re
+import stat
+import sys
 
-from xxd import HexType, COLS, ebcdic_table, Dumper
+from xxd import Dumper
+from xxd.line_formatter import LineFormatter, swap_groups
+from xxd.numpy_formatter import NumpyLineFormatter
+from xxd.parallel import split_text, parallel_results, patch_range
+
+BIT_OCTETS = re.compile(rb"[01]{8}")
+HEX_PAIRS = re.compile(rb"[0-9a-fA-F]{2}")
+OFFSET = re.compile(rb"[0-9a-fA-F]*")
+
+
+def decode_hex(field: bytes) -> bytes:
+    """Returns the bytes described by the hex digits in a field"""
+    # Whole groups of hex pairs are decoded in one call.  Anything
+    # unusual in the field is left to the slower regular expression.
+    try:
+        return bytes.fromhex(field.decode("latin-1"))
+    except ValueError:
+        return bytes(int(hex_pair, 16) for hex_pair in HEX_PAIRS.findall(field))
 
 
 class HexDumper(Dumper):
@@ -23,190 +42,179 @@ class HexDumper(Dumper):
             octets_per_group = 2
         return octets_per_group
 
-    def mainline(self):
-        """Runs the hex dumper"""
-
-        super().mainline() # Important!
-
-        self.autoskip_lines = []
-        self.autoskip_state = 0
-        while True:
-            chunk_size = self.cols
-            if self.length is not None:
-                if self.so_far + chunk_size > self.length:
-                    chunk_size = self.length % chunk_size
-            data = self.fpin.read(chunk_size)
-            if len(data) == 0:
-                break
-            if type(data) == str:
-                data = bytes(data.encode("utf-8"))
-
-            # Handle normal output
-
-            data_list = [
-                data[i: i + self.octets_per_group: 1]
-                for i in range(0, len(data), self.octets_per_group)
-            ]
-
-            hex_list = [
-                "".join([self.data_format(b, self.hextype) for b in chunk_bytes])
-                for chunk_bytes in data_list
-            ]
-
-            text_list = [
-                "".join([self.text_format(b) for b in chunk_bytes])
-                for chunk_bytes in data_list
-            ]
-
-            sdata = " ".join(hex_list)
-            if self.cols % 2 == 1:
-                sdata += " "
-            if self.uppercase:
-                sdata = sdata.upper()
-            text = "".join(text_list)
-            offset_shown = self.file_offset
-            if hasattr(self, "offset"):
-                if self.offset is not None:
-                    if type(self.offset) != int:
-                        self.offset = int(self.offset, 0)
-                    add_offset = self.offset
-                    offset_shown += add_offset
-            if self.decimal:
-                offset_format_str = "08d"
+    def iter_output(self):
+        """Generator that yields the lines of the hex dump, with runs of
+        lines of zeros shown as xxd shows them"""
+        self.zero_run_count = 0
+        self.zero_run_offset = None
+        if self.cols == 0:
+            return  # Nothing can be shown on a zero-width line
+
+        for segment in self.segments():
+            if type(segment) == tuple:
+                self.add_zero_run(*segment)
             else:
-                offset_format_str = "08x"
-
-            group_width = {
-                HexType.HEX_BITS: 8,
-                HexType.HEX_NORMAL: 4
-            }.get(self.hextype, 4)
-            n_groups = int(self.cols / self.octets_per_group)
-            data_width = (1 + group_width) * n_groups  # Add 1 for the space separator
-            line = f"{offset_shown:{offset_format_str}}: {sdata:{data_width}s} {text}\n"
-
-            if not self.autoskip:
-                self.xxd_line(line)
+                if self.zero_run_count:
+                    yield self.end_zero_run()
+                yield segment
+        if self.zero_run_count:
+            yield self.end_zero_run(at_eof=True)
+
+    def get_formatter(self) -> LineFormatter:
+        """Returns the line formatter for this dump, creating it if need be"""
+        if self.formatter is None:
+            if self.engine == "numpy":
+                self.formatter = NumpyLineFormatter(self)
             else:
-                self.xxd_line_autoskip(line, sdata)
-
-            # Done with normal output
-
-            self.file_offset += chunk_size
-            self.so_far += len(data)
-            if self.length is not None:
-                length = self.length
-                if self.so_far >= length:
-                    break
-
-        if self.autoskip:
-            if self.autoskip_state == 0:
-                pass
-            elif self.autoskip_state == 1:
-                self.xxd_line(self.autoskip_lines[0])
-            elif self.autoskip_state == 2:
-                self.xxd_line(self.autoskip_lines[0])
-                self.xxd_line(self.autoskip_lines[1])
-            elif self.autoskip_state == 3:
-                self.xxd_line(self.autoskip_lines[0])
-                self.xxd_line("*\n")
-                self.xxd_line(self.autoskip_lines[-1])
-
-    def mainline_reverse(self):
-        """Reconstructs the original file"""
-        if self.seek:
-            for i in range(self.seek):
-                self.fpout.write(b'\x00')
-
-        for line in self.fpin.readlines():
-
-            # Convert to string
-            line = str(line)
-
-            # Skip the offset
-            p = line.find(": ")
-            if p < 0:
-                continue
-            line = line[p + 2:]
-
-            # Skip the text
-            q = line.find("  ")
-            if q < 0:
-                continue
-            line = line[0:q]
-
-            # Get the hex pairs, convert to characters, and write to output
-            hex_pairs = [int(hex_pair, 16)
-                         for hex_pair
-                         in re.findall("[0-9a-fA-F]{2}", line)]
-            for c in hex_pairs:
-                b = bytes([c])
-                try:
-                    self.fpout.write(b)
-                except TypeError:
-                    ch = chr(c)
-                    self.fpout.write(ch)
-
-    def text_format(self, c: int):
-        if self.EBCDIC:
-            c = ebcdic_table[c]
-        if c < 128 and chr(c).isprintable():
-            return chr(c)
+                self.formatter = LineFormatter(self)
+        return self.formatter
+
+    def iter_segments(self):
+        """Generator that reads the input in large blocks and yields their
+        formatted lines.  With autoskip, each run of lines that are all
+        zeros is yielded as a tuple of its file offset and number of lines
+        instead, and the lines are not formatted."""
+        formatter = self.get_formatter()
+        cols = self.cols
+        zero_runs = re.compile(rb"\0{%d,}" % cols)
+        for block in self.read_blocks(cols, skip_holes=self.autoskip):
+            if type(block) == int:
+                # A hole in a sparse file, which reads as zeros
+                yield self.file_offset, block // cols
+            elif not self.autoskip:
+                yield formatter.format_lines(self.file_offset, block)
+            else:
+                # Find the runs of zero bytes that cover whole lines.  Only
+                # a full line counts as a line of zeros.
+                full = len(block) - len(block) % cols
+                start = 0  # Start of the lines not yet yielded
+                for match in zero_runs.finditer(block, 0, full):
+                    first = match.start() + -match.start() % cols
+                    last = match.end() - match.end() % cols
+                    if first < last:
+                        if start < first:
+                            yield formatter.format_lines(self.file_offset + start, block[start:first])
+                        yield self.file_offset + first, (last - first) // cols
+                        start = last
+                if start < len(block):
+                    yield formatter.format_lines(self.file_offset + start, block[start:])
+            length = block if type(block) == int else len(block)
+            self.file_offset += length
+            self.so_far += length
+
+    def add_zero_run(self, offset: int, count: int):
+        """Adds lines of zeros to the current run of them"""
+        if self.zero_run_count == 0:
+            self.zero_run_offset = offset
+        self.zero_run_count += count
+
+    def end_zero_run(self, at_eof: bool = False) -> bytes:
+        """Returns what is shown for a run of lines of zeros, as xxd does.
+        A run of one or two lines is shown in full.  A longer run is shown
+        as its first line followed by a '*' line, and if it is at the end
+        of the file, by its last line as well.  Three lines at the end
+        of the file are shown in full."""
+        count = self.zero_run_count
+        if count == 0:
+            return b""
+        formatter = self.get_formatter()
+        zero_line = bytes(self.cols)
+        first = self.zero_run_offset
+        if count <= 2 or (at_eof and count == 3):
+            lines = [formatter.format_line(first + i * self.cols, zero_line) for i in range(count)]
         else:
-            return "."
-
-    def xxd_line(self, line):
-        bline = line.encode('utf-8')
+            lines = [formatter.format_line(first, zero_line), b"*\n"]
+            if at_eof:
+                last = first + (count - 1) * self.cols
+                lines.append(formatter.format_line(last, zero_line))
+        self.zero_run_count = 0
+        self.zero_run_offset = None
+        return b"".join(lines)
+
+    def decode_line(self, line: bytes) -> tuple[int, bytes] | None:
+        """Returns the offset at the start of one line of a hex dump and
+        the bytes described by the digits between the offset and the
+        text, if any.  Returns None if the line is not a line of a hex
+        dump."""
+
+        # Get the offset
+        p = line.find(b": ")
+        if p < 0:
+            return None
         try:
-            self.fpout.write(bline)
-        except TypeError as e:
-            self.fpout.write(line)
-        self.fpout.flush()
-
-    def xxd_line_autoskip(self, line: str, sdata: str):
-        sdata = sdata.replace(" ", "")
-        allzero = all([c == "0" for c in sdata])
-
-        if self.autoskip_state == 0:
-            if allzero:
-                if len(self.autoskip_lines) == 0:
-                    self.autoskip_lines.append(line)
-                else:
-                    self.xxd_line(self.autoskip_lines[0])
-                    self.autoskip_lines.clear()
-                    self.xxd_line("*\n")
-                    self.autoskip_lines.append(line)
-                self.autoskip_state = 1
+            offset = int(line[:p], 16)
+        except ValueError:
+            # Like xxd, use whatever hex digits the line starts with
+            offset = int(OFFSET.match(line).group() or b"0", 16)
+
+        # Skip the text, if there is any.  A short last line of a -e dump
+        # can have wide gaps in its digits, so the text is found from the
+        # width of the digits instead.
+        if self.little_endian:
+            field = line[p + 2:p + 2 + self.get_formatter().data_width]
+        else:
+            q = line.find(b"  ", p + 2)
+            field = line[p + 2:q] if q >= 0 else line[p + 2:]
+        return offset, self.decode_field(field)
+
+    def decode_field(self, field: bytes) -> bytes:
+        """Returns the bytes described by the hex or binary digits of one
+        line of a dump"""
+        if self.binary:
+            # All the binary digits of the line are converted in one call
+            digits = b"".join(field.split())
+            if len(digits) % 8 == 0 and not digits.strip(b"01"):
+                return int(digits or b"0", 2).to_bytes(len(digits) // 8, "big")
+            return bytes(int(octet, 2) for octet in BIT_OCTETS.findall(field))
+
+        data = decode_hex(field)
+
+        # Put the bytes of -e groups back in order.  With -g 0, the whole
+        # line is one group.
+        if self.little_endian:
+            n = self.octets_per_group or self.cols
+            if len(data) % n:
+                # A short group, which is not the same length as the others
+                data = b"".join([decode_hex(group)[::-1] for group in field.split()])
             else:
-                self.xxd_line(line)
-                self.autoskip_state = 0
+                data = swap_groups(data, n)
+        return data
 
-        elif self.autoskip_state == 1:
-            if allzero:
-                self.autoskip_lines.append(line)
-                self.autoskip_state = 2
-            else:
-                self.xxd_line(self.autoskip_lines[0])
-                self.xxd_line(line)
-                self.autoskip_state = 0
-
-        elif self.autoskip_state == 2:
-            if allzero:
-                self.autoskip_lines.append(line)
-                self.autoskip_state = 3
-            else:
-                self.xxd_line(self.autoskip_lines[0])
-                self.xxd_line(self.autoskip_lines[1])
-                self.autoskip_lines.clear()
-                self.xxd_line(line)
-                self.autoskip_state = 0
-
-        elif self.autoskip_state == 3:
-            if allzero:
-                self.autoskip_lines.append(line)
-                self.autoskip_state = 3
-            else:
-                self.xxd_line(self.autoskip_lines[0])
-                self.xxd_line("*\n")
-                self.autoskip_lines.clear()
-                self.xxd_line(line)
-                self.autoskip_state = 0
+    def mainline_reverse(self):
+        """Reconstructs the original file.  Each line is written at the
+        offset it starts with, plus the -s seek.  Consecutive lines are
+        written out together in large batches, and the output seeks over
+        any gap between lines, such as a '*' line, so that a sparse file
+        stays sparse.  The hex dump is read a line at a time, so memory
+        use does not depend on the size of the input.  With --jobs, the
+        lines of a regular input file are written by a pool of worker
+        processes straight into a regular output file."""
+        ranges = split_text(self)
+        if ranges is not None and self.outfile not in [None, sys.stdout]:
+            if stat.S_ISREG(os.fstat(self.fpout.fileno()).st_mode):
+                for _ in parallel_results(self, patch_range, ranges):
+                    pass
+                return
+
+        base = self.seek or 0
+        start = 0  # Where the batch goes in the output
+        batch = bytearray()
+        for line in self.fpin:
+            if line.startswith(b"*"):
+                # Lines of zeros left out by -a.  The offset of the next
+                # line says where they end, and the output seeks there
+                # rather than having the zeros written.
+                continue
+            decoded = self.decode_line(line)
+            if not decoded or not decoded[1]:
+                continue
+            offset, data = decoded
+            offset += base
+            if batch and (offset != start + len(batch) or len(batch) >= self.block_size):
+                self.write_at(start, batch)
+                batch.clear()
+            if not batch:
+                start = offset
+            batch += data
+        if batch:
+            self.write_at(start, batch)
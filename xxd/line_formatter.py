@@ -0,0 +1,120 @@
+from array import array
+from binascii import hexlify
+
+from xxd import HexType, ebcdic_table
+
+# Bytes shown as themselves in the text column: printable ASCII only
+ASCII_TEXT_TABLE = bytes(c if 0x20 <= c < 0x7f else ord(".") for c in range(256))
+
+# The same, but for input that is EBCDIC rather than ASCII
+EBCDIC_TEXT_TABLE = bytes(ASCII_TEXT_TABLE[ebcdic_table[c]] for c in range(256))
+
+# The eight binary digits of every byte value, used by -b
+BITS_TABLE = [format(c, "08b").encode("ascii") for c in range(256)]
+
+# Array type codes whose items are 2, 4 and 8 bytes long, for swapping
+# the bytes of whole groups at once with -e
+SWAP_TYPECODES = {array(code).itemsize: code for code in "QLIH"}
+
+
+def swap_groups(data: bytes, n: int) -> bytes:
+    """Returns data with the order of the bytes reversed within each group
+    of n bytes.  A short last group is reversed as it is."""
+    if n in SWAP_TYPECODES and len(data) % n == 0:
+        groups = array(SWAP_TYPECODES[n], data)
+        groups.byteswap()
+        return groups.tobytes()
+    return b"".join([data[i:i + n][::-1] for i in range(0, len(data), n)])
+
+
+class LineFormatter:
+    """Turns raw bytes into lines of a normal (hex or binary) dump.
+
+    Everything that depends only on the options, such as the text
+    translation table, the offset format and the padding of a full
+    line, is worked out once when the formatter is created, so that
+    formatting a block of lines needs only a few C-level calls per line.
+    """
+
+    def __init__(self, dumper):
+        self.cols: int = dumper.cols
+        self.octets_per_group: int = dumper.octets_per_group or dumper.cols
+        self.add_offset: int = dumper.offset or 0
+        self.offset_format: bytes = b"%08d: " if dumper.decimal else b"%08x: "
+        self.text_table: bytes = EBCDIC_TEXT_TABLE if dumper.EBCDIC else ASCII_TEXT_TABLE
+        self.bits: bool = dumper.hextype == HexType.HEX_BITS
+        self.little_endian: bool = dumper.hextype == HexType.HEX_LITTLEENDIAN
+        self.uppercase: bool = dumper.uppercase
+
+        # As in xxd, the data takes the width of a full line of groups,
+        # each followed by a space, less the space after the last one
+        n = self.octets_per_group
+        group_width = (8 if self.bits else 2) * n + 1
+        self.data_width: int = (group_width * self.cols - 1) // n
+
+        # Every full line has the same length of data, so its padding
+        # can be built into the line format once and for all.
+        full_width = len(self.format_data(bytes(self.cols)))
+        padding = b" " * max(0, self.data_width - full_width)
+        self.line_format: bytes = self.offset_format + b"%s" + padding + b"  %s\n"
+
+    def format_data(self, data: bytes, swapped: bytes = None) -> bytes:
+        """Returns the hex or binary digits of one line, in groups.  With
+        -e, the bytes of each group are shown in reverse order, and a
+        short group at the end of the file is aligned to the right, as
+        xxd does.  The caller may pass the data already swapped."""
+        if self.little_endian:
+            n = self.octets_per_group
+            if swapped is None:
+                swapped = swap_groups(data, n)
+            sdata = hexlify(swapped, b" ", -n)
+            short = len(data) % n
+            if short and len(data) < self.cols:
+                width = 2 * min(n, self.cols - (len(data) - short))
+                sdata = sdata[:len(sdata) - 2 * short] + sdata[len(sdata) - 2 * short:].rjust(width)
+            if self.uppercase:
+                sdata = sdata.upper()
+        elif self.bits:
+            n = self.octets_per_group
+            sdata = b" ".join([
+                b"".join(map(BITS_TABLE.__getitem__, data[i:i + n]))
+                for i in range(0, len(data), n)
+            ])
+        else:
+            sdata = hexlify(data, b" ", -self.octets_per_group)
+            if self.uppercase:
+                sdata = sdata.upper()
+        return sdata
+
+    def format_line(self, offset: int, data: bytes) -> bytes:
+        """Returns one line of the dump, which may be shorter than cols"""
+        sdata = self.format_data(data).ljust(self.data_width)
+        text = data.translate(self.text_table)
+        return self.offset_format % (offset + self.add_offset) + sdata + b"  " + text + b"\n"
+
+    def format_lines(self, offset: int, block) -> bytes:
+        """Returns the lines of the dump for a block of bytes that starts
+        at the specified file offset.  Only the last line can be short."""
+        data = bytes(block)
+        cols = self.cols
+        full = len(data) - len(data) % cols
+        line_format = self.line_format
+        format_data = self.format_data
+        text_table = self.text_table
+        start = offset + self.add_offset
+        if self.little_endian and cols % self.octets_per_group == 0:
+            # Swap the bytes of all the groups of full lines at once
+            swapped = swap_groups(data[:full], self.octets_per_group)
+            lines = [
+                line_format % (start + i, format_data(data[i:i + cols], swapped[i:i + cols]),
+                               data[i:i + cols].translate(text_table))
+                for i in range(0, full, cols)
+            ]
+        else:
+            lines = [
+                line_format % (start + i, format_data(data[i:i + cols]), data[i:i + cols].translate(text_table))
+                for i in range(0, full, cols)
+            ]
+        if full < len(data):
+            lines.append(self.format_line(offset + full, data[full:]))
+        return b"".join(lines)
@@ -0,0 +1,121 @@
+from importlib.util import find_spec
+
+from xxd.line_formatter import LineFormatter
+
+# NumPy itself is only imported once a block is big enough to need it,
+# since importing it takes longer than dumping a small file
+HAVE_NUMPY = find_spec("numpy") is not None
+numpy = None
+
+# Blocks with fewer lines than this are cheaper to format in pure Python
+MIN_LINES = 64
+
+
+class NumpyLineFormatter(LineFormatter):
+    """A LineFormatter that formats all the full lines of a block at once.
+
+    The block is viewed as a two-dimensional array with one row per line,
+    and the output is built as a second array of characters whose columns
+    are filled in by table lookups: offset digits, hex (or binary) digits
+    and the text column.  With -e, the digits come from the bytes of each
+    group in reverse order.  The whole block is then emitted with a single
+    tobytes() call.  Short blocks, the last partial line, and blocks whose
+    offsets change width part way through are left to LineFormatter.
+    """
+
+    def __init__(self, dumper):
+        super().__init__(dumper)
+        self.decimal: bool = self.offset_format == b"%08d: "
+        self.prepared = False
+        self.templates = {}
+
+    def prepare(self):
+        """Imports NumPy and builds the lookup tables, the first time that
+        a block is big enough to be formatted with them"""
+        global numpy
+        import numpy
+
+        cols = self.cols
+        n = self.octets_per_group
+        digits = b"0123456789ABCDEF" if self.uppercase else b"0123456789abcdef"
+        self.digits = numpy.frombuffer(digits, dtype=numpy.uint8)
+        self.offset_digits = numpy.frombuffer(b"0123456789abcdef", dtype=numpy.uint8)
+        self.text_lookup = numpy.frombuffer(self.text_table, dtype=numpy.uint8)
+
+        # Position of the first character for each byte within the data
+        # part of a line, allowing for the spaces between groups
+        index = numpy.arange(cols)
+        self.data_positions = index * (8 if self.bits else 2) + index // n
+
+        # Byte shown in each position, which with -e is the byte at the
+        # other end of its group
+        self.data_order = None
+        if self.little_endian:
+            self.data_order = numpy.concatenate([
+                numpy.arange(min(start + n, cols) - 1, start - 1, -1)
+                for start in range(0, cols, n)
+            ])
+        self.prepared = True
+
+    def get_template(self, width: int):
+        """Returns a full line with blanks where the offset, data and text
+        go, along with the positions of the data and text columns, for
+        offsets that are 'width' digits long"""
+        template = self.templates.get(width)
+        if template is None:
+            zeros = bytes(self.cols)
+            line = self.line_format % (0, self.format_data(zeros), zeros.translate(self.text_table))
+            line = b"0" * (width - 8) + line if width > 8 else line
+            row = numpy.frombuffer(line, dtype=numpy.uint8)
+            data_start = width + 2
+            text_start = len(line) - 1 - self.cols
+            template = (row, self.data_positions + data_start, numpy.arange(self.cols) + text_start)
+            self.templates[width] = template
+        return template
+
+    def offset_width(self, offset: int) -> int:
+        """Returns the number of digits in a displayed offset"""
+        return len(self.offset_format % offset) - 2
+
+    def format_lines(self, offset: int, block) -> bytes:
+        cols = self.cols
+        n_lines = len(block) // cols
+        first = offset + self.add_offset
+        last = first + (n_lines - 1) * cols
+        width = self.offset_width(last)
+        if n_lines < MIN_LINES or self.offset_width(first) != width:
+            return super().format_lines(offset, block)
+        if not self.prepared:
+            self.prepare()
+
+        full = n_lines * cols
+        data = numpy.frombuffer(block, dtype=numpy.uint8, count=full).reshape(n_lines, cols)
+        row, data_positions, text_positions = self.get_template(width)
+        out = numpy.empty((n_lines, len(row)), dtype=numpy.uint8)
+        out[:] = row
+
+        # Offset column
+        offsets = numpy.arange(first, last + 1, cols, dtype=numpy.uint64)
+        for k in range(width):
+            if self.decimal:
+                digit = (offsets // numpy.uint64(10 ** (width - 1 - k))) % numpy.uint64(10)
+            else:
+                digit = (offsets >> numpy.uint64(4 * (width - 1 - k))) & numpy.uint64(15)
+            out[:, k] = self.offset_digits[digit]
+
+        # Data columns
+        shown = data if self.data_order is None else data[:, self.data_order]
+        if self.bits:
+            for k in range(8):
+                out[:, data_positions + k] = ord("0") + ((shown >> (7 - k)) & 1)
+        else:
+            out[:, data_positions] = self.digits[shown >> 4]
+            out[:, data_positions + 1] = self.digits[shown & 15]
+
+        # Text column
+        out[:, text_positions] = self.text_lookup[data]
+
+        result = out.tobytes()
+        if full < len(block):
+            result += self.format_line(offset + full, bytes(block[full:]))
+        return result
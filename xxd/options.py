@@ -0,0 +1,65 @@
+from types import MappingProxyType
+
+# Members of a dumper that hold its options, as opposed to the state of a run
+OPTION_NAMES = (
+    "autoskip", "binary", "block_size", "capitalize", "chunk_size", "cols",
+    "decimal", "EBCDIC", "engine", "flush_policy", "hextype", "include",
+    "include_style", "infile", "jobs", "length", "little_endian", "name",
+    "octets_per_group", "offset", "outfile", "patch", "postscript",
+    "reverse", "seek", "seek_whence", "uppercase", "version",
+)
+
+
+class Options:
+    """The options of a dumper, checked once and then fixed.
+
+    Options are made from the same argument dictionary as a dumper, and
+    hold the values that the dumper would work out from it, with the
+    defaults for its output type filled in.  Anything that depends only
+    on the options, such as the line formatter of a hex dump with its
+    widths and formats, is worked out here as well.  Any number of
+    dumpers can then be created from the same Options, in any thread,
+    without the arguments being checked again.
+    """
+
+    __slots__ = OPTION_NAMES + ("args", "dumper_class", "formatter")
+
+    def __init__(self, args: dict, dumper_class=None):
+        """Checks the arguments, which raises a ValueError or RuntimeError
+        as creating a dumper would.  The class of dumper is chosen from
+        the arguments if it is not given."""
+        if dumper_class is None:
+            dumper_class = choose_dumper_class(args)
+        dumper = dumper_class(args)
+        for name in OPTION_NAMES:
+            object.__setattr__(self, name, getattr(dumper, name))
+        object.__setattr__(self, "args", MappingProxyType(dict(dumper.args)))
+        object.__setattr__(self, "dumper_class", dumper_class)
+        object.__setattr__(self, "formatter", dumper.get_formatter() if dumper.cols else None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Options cannot be changed: {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Options cannot be changed: {name}")
+
+    def __reduce__(self):
+        # Sent to another process as the arguments, which are checked again there
+        return type(self), (dict(self.args), self.dumper_class)
+
+    def __repr__(self) -> str:
+        return f"Options({dict(self.args)!r}, {self.dumper_class.__name__})"
+
+    def dumper(self):
+        """Returns a new dumper with these options"""
+        return self.dumper_class(self)
+
+
+def choose_dumper_class(args: dict):
+    """Returns the class of dumper for the output type in the arguments"""
+    from xxd import CDumper, HexDumper, PostscriptDumper
+    if args.get("include", False):
+        return CDumper
+    if args.get("postscript", False):
+        return PostscriptDumper
+    return HexDumper
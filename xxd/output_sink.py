@@ -0,0 +1,50 @@
+from xxd import BLOCK_SIZE
+
+FLUSH_POLICIES = ["line", "block", "end"]
+
+
+class OutputSink:
+    """Batches the writes of a dumper to a binary output file into a
+    large buffer.
+
+    The flush policy controls how soon output reaches the output file:
+    - "line": every write is passed on and flushed at once, which is
+      what an interactive user watching a terminal wants
+    - "block": output is passed on and flushed once per input block
+    - "end": output is passed on whenever the buffer fills up, and only
+      flushed when the sink is closed
+    """
+
+    def __init__(self, fpout, flush_policy: str = "block", buffer_size: int = BLOCK_SIZE):
+        self.fpout = fpout
+        self.flush_policy: str = flush_policy
+        self.buffer_size: int = buffer_size
+        self.buffer = bytearray()
+
+    def write(self, data: bytes):
+        """Adds data to the buffer, passing it on if the policy says so"""
+        self.buffer += data
+        if self.flush_policy == "line":
+            self.flush()
+        elif len(self.buffer) >= self.buffer_size:
+            self.drain()
+
+    def end_block(self):
+        """Called by the dumpers when they have finished an input block"""
+        if self.flush_policy == "block":
+            self.flush()
+
+    def drain(self):
+        """Passes the buffered output on to the output file"""
+        if self.buffer:
+            self.fpout.write(self.buffer)
+            self.buffer.clear()
+
+    def flush(self):
+        """Passes the buffered output on and flushes the output file"""
+        self.drain()
+        self.fpout.flush()
+
+    def close(self):
+        """Flushes any remaining output.  The output file stays open."""
+        self.flush()
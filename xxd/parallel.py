@@ -0,0 +1,169 @@
+import io
+import os
+import stat
+from collections import deque
+
+# Largest number of input bytes given to a worker at one time
+RANGE_SIZE = 1 << 24
+
+
+def split_input(dumper) -> list[tuple[int, int]] | None:
+    """Splits the part of the input file that is to be dumped into byte
+    ranges that start on line boundaries.  Returns None if the input
+    cannot be split, because it is not mapped into memory.  That rules
+    out pipes, and also files such as those in /proc, which claim to be
+    empty and must be read to the end to find their contents."""
+    infile = dumper.infile
+    if infile is None or infile == '-' or dumper.cols == 0 or dumper.source is None:
+        return None
+    file_size = len(dumper.source)
+    if file_size == 0:
+        return None
+
+    start = min(dumper.start_offset(file_size), file_size)
+    stop = file_size
+    if dumper.length is not None:
+        stop = min(stop, start + dumper.length)
+
+    # Give every worker something to do, but not too much at a time
+    size = min(RANGE_SIZE, -(-(stop - start) // dumper.jobs))
+    size = max(dumper.cols, size + -size % dumper.cols)
+    return [(i, min(i + size, stop)) for i in range(start, stop, size)]
+
+
+def split_text(dumper, at_lines: bool = True) -> list[tuple[int, int]] | None:
+    """Splits a dump that is to be reversed into byte ranges, which start
+    at the beginning of a line if at_lines is set.  Returns None if the
+    input cannot be split, because it is not a regular file, or it is
+    one that claims to be empty, as files in /proc do."""
+    infile = dumper.infile
+    if dumper.jobs == 1 or infile is None or infile == '-':
+        return None
+    st = os.stat(infile)
+    if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+        return None
+
+    size = st.st_size
+    step = max(1, min(RANGE_SIZE, -(-size // dumper.jobs)))
+    bounds = [0]
+    with open(infile, "rb") as fp:
+        while bounds[-1] + step < size:
+            bound = bounds[-1] + step
+            if at_lines:
+                bound = next_line(fp, bound)
+            if bound >= size:
+                break
+            bounds.append(bound)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def next_line(fp, offset: int) -> int:
+    """Returns the offset of the first line that starts at or after the
+    offset, or the size of the file if there is none"""
+    fp.seek(offset - 1)
+    while chunk := fp.read(1 << 16):
+        p = chunk.find(b"\n")
+        if p >= 0:
+            return fp.tell() - len(chunk) + p + 1
+    return fp.tell()
+
+
+def read_range(infile: str, start: int, stop: int) -> bytes:
+    """Returns bytes start to stop of the input file"""
+    with open(infile, "rb") as fp:
+        fp.seek(start)
+        return fp.read(stop - start)
+
+
+def patch_range(cls, args: dict, start: int, stop: int):
+    """Worker that reverses the lines in bytes start to stop of a dump,
+    writing them straight into the output file at their offsets"""
+    dumper = cls(dict(args, jobs=1, patch=True))
+    dumper.fpin = io.BytesIO(read_range(dumper.infile, start, stop))
+    with open(dumper.outfile, "r+b") as dumper.fpout:
+        dumper.mainline_reverse()
+
+
+def decode_range(cls, args: dict, start: int, stop: int):
+    """Worker that decodes bytes start to stop of a postscript dump.
+    Returns the bytes and any odd digit left over at the end."""
+    return cls.decode_chunk(b"", read_range(args["infile"], start, stop))
+
+
+def dump_range(cls, args: dict, start: int, stop: int):
+    """Worker that dumps bytes start to stop of the input file.
+
+    Returns the output segments, with neighbouring segments of the same
+    kind merged, and the number of bytes that were read.
+    """
+    dumper = cls(dict(args, seek=start, len=stop - start, jobs=1))
+    segments = []
+    texts = []
+    dumper.open_input()
+    try:
+        dumper.seek_input()
+        for segment in dumper.iter_segments():
+            if type(segment) != tuple:
+                texts.append(segment)
+                continue
+            if texts:
+                segments.append(dumper.segment_separator.join(texts))
+                texts = []
+            if segments and type(segments[-1]) == tuple:
+                offset, count = segments.pop()
+                segment = (offset, count + segment[1])
+            segments.append(segment)
+    finally:
+        dumper.close_input()
+    if texts:
+        segments.append(dumper.segment_separator.join(texts))
+    return segments, dumper.so_far
+
+
+def parallel_segments(dumper, ranges: list[tuple[int, int]]):
+    """Generator that yields the output segments of the ranges in order,
+    as they are formatted by a pool of worker processes"""
+    for segments, so_far in parallel_results(dumper, dump_range, ranges):
+        dumper.so_far += so_far
+        yield from segments
+
+
+def parallel_results(dumper, worker, ranges: list[tuple[int, int]]):
+    """Generator that yields the results of a worker for each of the ranges
+    in order, as a pool of processes works through them.  Only a few
+    ranges per process are in progress at a time, so that memory use
+    does not depend on the size of the input."""
+    from concurrent.futures import ProcessPoolExecutor  # Only needed with --jobs
+    cls = type(dumper)
+    with ProcessPoolExecutor(max_workers=dumper.jobs) as executor:
+        pending = deque()
+        ranges = iter(ranges)
+        for start, stop in ranges:
+            pending.append(executor.submit(worker, cls, dumper.args, start, stop))
+            if len(pending) == 2 * dumper.jobs:
+                break
+        while pending:
+            result = pending.popleft().result()
+            for start, stop in ranges:
+                pending.append(executor.submit(worker, cls, dumper.args, start, stop))
+                break
+            yield result
+
+
+def run_dumper(cls, args: dict):
+    """Worker that runs a dumper of the given class"""
+    cls(args).run()
+
+
+def run_dumpers(cls, arg_list: list[dict], jobs: int):
+    """Runs a dumper for each of the argument dictionaries, in a pool of
+    worker processes if there is more than one job"""
+    if jobs == 1:
+        for args in arg_list:
+            run_dumper(cls, args)
+        return
+    from concurrent.futures import ProcessPoolExecutor  # Only needed with --jobs
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for _ in executor.map(run_dumper, [cls] * len(arg_list), arg_list):
+            pass
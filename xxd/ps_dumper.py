@@ -1,6 +1,10 @@
-import re
+from binascii import hexlify, unhexlify
 
 from xxd import Dumper
+from xxd.parallel import split_text, parallel_results, decode_range, read_range
+
+# Bytes that are removed from the input before it is decoded
+NON_HEX_DIGITS = bytes(c for c in range(256) if chr(c) not in "0123456789abcdefABCDEF")
 
 
 class PostscriptDumper(Dumper):
@@ -15,53 +19,62 @@ class PostscriptDumper(Dumper):
     def __init__(self, args):
         super().__init__(args)
 
-    def mainline(self):
-        super().mainline()  # Important!
-        while True:
-            chunk_size = self.cols
-            if self.length is not None:
-                if self.so_far + chunk_size > self.length:
-                    chunk_size = self.length % chunk_size
-            data = self.fpin.read(chunk_size)
-            if len(data) == 0:
-                break
-
-            if type(data) == str:
-                data = bytes(data.encode("utf-8"))
+    def iter_output(self):
+        """Generator that yields the lines of the postscript dump"""
+        yield from self.segments()
+        if self.cols == 0:
+            yield b"\n"  # The end of the one long line
 
-            line = "".join([self.data_format(b, self.hextype) for b in data]) + "\n"
-            try:
-                self.fpout.write(line)
-            except TypeError:
-                self.fpout.write(line.encode('utf-8'))
-
-            self.file_offset += chunk_size
-            self.so_far += len(data)
-            if self.length is not None:
-                length = self.length
-                if self.so_far >= length:
-                    break
+    def iter_segments(self):
+        """Generator that reads the input in large blocks and yields their
+        lines of hex digits.  Each block is converted in one call, which
+        also puts a newline after every self.cols bytes.  With -c 0, there
+        are no line breaks at all."""
+        cols = self.cols
+        for block in self.read_blocks(cols or 1):
+            if cols == 0:
+                digits = hexlify(block)
+            else:
+                digits = hexlify(block, b"\n", -cols) + b"\n"
+            yield digits.upper() if self.uppercase else digits
+            self.file_offset += len(block)
+            self.so_far += len(block)
 
     def mainline_reverse(self):
-        """Reconstructs the original file"""
+        """Reconstructs the original file.  The input is decoded in chunks
+        of --block-size bytes regardless of where its lines end.  As with
+        xxd, anything other than hex digits is ignored, so a pair of
+        digits may be split across lines or chunks.  The output starts at
+        the -s seek.  With --jobs, a regular input file is decoded by a
+        pool of worker processes instead."""
         super().mainline_reverse()  # Important! Or maybe not, for ps
-        if self.seek:
-            for i in range(self.seek):
-                self.fpout.write(b'\x00')
-
-        for line in self.fpin.readlines():
+        offset = self.seek or 0
+        nibble = b""  # Odd digit left over from the previous chunk
+        ranges = split_text(self, at_lines=False)
+        if ranges is None:
+            while chunk := self.fpin.read(self.block_size):
+                data, nibble = self.decode_chunk(nibble, chunk)
+                if data:
+                    self.write_at(offset, data)
+                    offset += len(data)
+            return
 
-            # Convert to string
-            line = str(line)
+        # The workers decode each range as though it starts with the first
+        # digit of a pair.  A range that follows an odd digit is decoded
+        # again here, which only happens with unusual input.
+        for (start, stop), (data, odd) in zip(ranges, parallel_results(self, decode_range, ranges)):
+            if nibble:
+                data, odd = self.decode_chunk(nibble, read_range(self.infile, start, stop))
+            nibble = odd
+            if data:
+                self.write_at(offset, data)
+                offset += len(data)
 
-            # Get the hex pairs, convert to characters, and write to output
-            hex_pairs = [int(hex_pair, 16)
-                         for hex_pair
-                         in re.findall("[0-9a-fA-F]{2}", line)]
-            for c in hex_pairs:
-                b = bytes([c])
-                try:
-                    self.fpout.write(b)
-                except TypeError:
-                    ch = chr(c)
-                    self.fpout.write(ch)
+    @staticmethod
+    def decode_chunk(nibble: bytes, chunk: bytes) -> tuple[bytes, bytes]:
+        """Returns the bytes described by the hex digits in a chunk of
+        input, which follow any odd digit left over from the chunk before,
+        and the odd digit left over at the end of this chunk, if any"""
+        digits = nibble + chunk.translate(None, NON_HEX_DIGITS)
+        even = len(digits) & ~1
+        return unhexlify(digits[:even]), digits[even:]